@@ -1,5 +1,5 @@
 # Dependencies:
-# pip install tqdm requests
+# pip install tqdm aiohttp
 
 import warnings
 import os
@@ -11,14 +11,18 @@ os.environ['PYTHONWARNINGS'] = 'ignore'
 import csv
 import sys
 import time
-import requests
 import json
 import random
 import string
 import re
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import asyncio
+import argparse
+import sqlite3
+import heapq
+import hashlib
+import aiohttp
 from tqdm import tqdm
-from collections import defaultdict
+from collections import defaultdict, Counter
 
 # ==========================================
 # 🔧 配置区域
@@ -26,10 +30,32 @@ from collections import defaultdict
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 SEEDS_FILE = os.path.join(BASE_DIR, 'seeds.txt')
 OUTPUT_FILE = os.path.join(BASE_DIR, 'raw_keywords.csv')
+CACHE_FILE = os.path.join(BASE_DIR, 'suggest_cache.sqlite') # 原始接口响应缓存，中断后重跑从这里继续
+CACHE_TTL_DAYS = 7 # 联想词变化不快，一周内的响应直接复用
+CACHE_COMMIT_EVERY = 50 # 每写入这么多条落盘一次，Ctrl-C 最多丢这么多
 
-MAX_WORKERS = 8
-DELAY_MIN = 0.5
-DELAY_MAX = 1.0
+MAX_WORKERS = 32 # 同时进行的查询数上限 (真正的请求并发由各来源的自适应限流决定)
+LOCALE = 'zh-CN' # 保持全球中文环境
+REQUEST_TIMEOUT = 5
+RETRIES = 2 # 429 / 5xx / 网络错误的重试次数
+
+# 每个来源一个令牌桶: rate = 每秒请求数, burst = 允许的突发请求数
+SOURCES = {
+    'Google': {'url': 'http://suggestqueries.google.com/complete/search', 'rate': 5.0, 'burst': 5},
+    'Bing': {'url': 'https://api.bing.com/osjson.aspx', 'rate': 5.0, 'burst': 5}
+}
+
+# 自适应并发 (AIMD): 请求顺利时缓慢加并发，遇到 429 或延迟飙升时减半
+INITIAL_CONCURRENCY = 4
+MAX_CONCURRENCY = 16
+LATENCY_BACKOFF_FACTOR = 2.0 # 平滑延迟超过基线的这么多倍就降速
+BACKOFF_COOLDOWN = 1.0 # 两次降速之间至少间隔的秒数，避免一次拥堵连续减半
+
+# 多层扩展: 返回的联想词再作为新的查询词，按优先级 (双平台共识、中文) 先挖价值高的
+MAX_DEPTH = 2 # 种子任务是第 0 层；0 = 只挖种子 + 字母后缀 (旧模式)
+MAX_NODES = 3000 # 最多查询多少个词
+MAX_REQUESTS = 6000 # 网络请求预算 (命中缓存不算)
+BASE_PRIORITY = 100 # 种子任务总是最先挖
 
 USER_AGENTS = [
     'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36',
@@ -50,126 +76,440 @@ def load_seeds():
         seeds = [line.strip() for line in f if line.strip()]
     return seeds
 
-def get_suggestions(url, params, source_name):
-    try:
-        headers = {'User-Agent': random.choice(USER_AGENTS)}
-        time.sleep(random.uniform(DELAY_MIN, DELAY_MAX))
-        response = requests.get(url, params=params, headers=headers, timeout=5)
-        if response.status_code == 200:
-            if source_name == 'Google':
-                data = response.json()
-                if len(data) > 1: return data[1]
-            elif source_name == 'Bing':
-                data = response.json()
-                if isinstance(data, list) and len(data) > 1: return data[1]
-                elif 'SearchSuggestions' in data: return [item['Query'] for item in data['SearchSuggestions']]
-    except:
-        pass
-    return []
-
-def mine_google(query):
-    # 保持全球中文环境
-    url = "http://suggestqueries.google.com/complete/search"
-    params = {'client': 'chrome', 'q': query, 'hl': 'zh-CN', 'ds': ''}
-    return get_suggestions(url, params, 'Google')
-
-def mine_bing(query):
-    url = "https://api.bing.com/osjson.aspx"
-    params = {'query': query, 'mkt': 'zh-CN'}
-    return get_suggestions(url, params, 'Bing')
-
-def mine_single_task(task):
+def build_params(source_name, query):
+    if source_name == 'Google':
+        return {'client': 'chrome', 'q': query, 'hl': LOCALE, 'ds': ''}
+    return {'query': query, 'mkt': LOCALE}
+
+def parse_suggestions(source_name, data):
+    """从接口返回的 JSON 里取出联想词列表；格式不对时抛 TypeError / KeyError (这样的响应不写缓存)"""
+    if isinstance(data, list):
+        suggestions = data[1] if len(data) > 1 else []
+    elif source_name == 'Bing' and isinstance(data, dict) and 'SearchSuggestions' in data:
+        suggestions = [item['Query'] for item in data['SearchSuggestions']]
+    else:
+        raise TypeError(f"unexpected {source_name} response: {type(data).__name__}")
+    if not isinstance(suggestions, list) or not all(isinstance(kw, str) for kw in suggestions):
+        raise TypeError(f"unexpected {source_name} suggestions: {type(suggestions).__name__}")
+    return suggestions
+
+class TokenBucket:
+    """令牌桶: 平均每秒 rate 个请求，最多攒 capacity 个做突发。代替固定的随机 sleep。"""
+
+    def __init__(self, rate, capacity):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    def refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self.lock: # 排队取令牌，先到先得
+            self.refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self.refill()
+            self.tokens -= 1
+
+    def pause(self, seconds):
+        # 被限流 (Retry-After) 时欠下令牌，之后的请求自然会等够这段时间；同时到来的多个 429 不叠加
+        self.refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+class AdaptiveLimiter:
+    """按来源自适应的并发上限 (AIMD)。
+
+    每次成功且延迟正常，上限加 1/上限 (约每一轮加 1)；遇到 429 或平滑延迟
+    超过历史基线 LATENCY_BACKOFF_FACTOR 倍时上限减半。
     """
-    注意：这里不再做过滤，而是先把所有东西都挖回来。
-    筛选逻辑放到最后统一处理，因为我们需要对比 Google 和 Bing 的结果。
+
+    def __init__(self, initial=INITIAL_CONCURRENCY, maximum=MAX_CONCURRENCY):
+        self.limit = float(initial)
+        self.maximum = maximum
+        self.in_flight = 0
+        self.condition = asyncio.Condition()
+        self.latency = None # 平滑延迟 (EWMA)
+        self.baseline = None # 近期最低的平滑延迟
+        self.last_backoff = 0.0
+        self.backoffs = 0
+
+    async def __aenter__(self):
+        async with self.condition:
+            await self.condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    async def __aexit__(self, *exc):
+        async with self.condition:
+            self.in_flight -= 1
+            self.condition.notify_all()
+
+    def backoff(self):
+        now = time.monotonic()
+        if now - self.last_backoff < BACKOFF_COOLDOWN:
+            return
+        self.last_backoff = now
+        self.limit = max(1.0, self.limit / 2)
+        self.backoffs += 1
+
+    def record(self, latency, throttled=False):
+        if throttled:
+            self.backoff()
+            return
+        self.latency = latency if self.latency is None else 0.8 * self.latency + 0.2 * latency
+        # 基线缓慢上浮，持续变慢的服务器最终会成为新常态，而不是一直减半
+        self.baseline = self.latency if self.baseline is None else min(self.baseline * 1.01, self.latency)
+        if self.latency > self.baseline * LATENCY_BACKOFF_FACTOR:
+            self.backoff()
+        else:
+            self.limit = min(self.maximum, self.limit + 1 / self.limit)
+
+class SuggestCache:
+    """原始联想接口响应的本地缓存 (SQLite)，按 (来源, 查询词, 语言) 存储，超过 ttl 秒视为过期。"""
+
+    def __init__(self, path, ttl):
+        self.ttl = ttl
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                source TEXT NOT NULL,
+                query TEXT NOT NULL,
+                locale TEXT NOT NULL,
+                body TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (source, query, locale)
+            )
+        """)
+        self.unsaved = 0
+
+    def get(self, source_name, query, locale):
+        row = self.conn.execute(
+            "SELECT body, fetched_at FROM responses WHERE source = ? AND query = ? AND locale = ?",
+            (source_name, query, locale)
+        ).fetchone()
+        if not row or time.time() - row[1] > self.ttl:
+            return None
+        return row[0]
+
+    def put(self, source_name, query, locale, body):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO responses (source, query, locale, body, fetched_at) VALUES (?, ?, ?, ?, ?)",
+            (source_name, query, locale, body, time.time())
+        )
+        self.unsaved += 1
+        if self.unsaved >= CACHE_COMMIT_EVERY:
+            self.conn.commit()
+            self.unsaved = 0
+
+    def delete(self, source_name, query, locale):
+        self.conn.execute("DELETE FROM responses WHERE source = ? AND query = ? AND locale = ?", (source_name, query, locale))
+
+    def prune(self):
+        self.conn.execute("DELETE FROM responses WHERE fetched_at < ?", (time.time() - self.ttl,))
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def normalize_query(query):
+    return ' '.join(query.lower().split())
+
+def keyword_score(kw, sources):
+    """扩展优先级: 每多一个平台推荐 +1，含中文 +1"""
+    return len(sources) + (1 if contains_chinese(kw) else 0)
+
+class Frontier:
+    """待挖查询词的优先队列，分数高的先出，同分时层数浅的先出。
+
+    去重只存查询词 (规范化后) 的 64 位哈希，不存字符串本身。同一个词后来
+    拿到更高分 (比如另一个平台也推荐了) 会以新分数重新入队，旧条目出队时跳过；
+    len() 只数还没挖的词，不数这些旧条目。
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.counter = 0
+        self.scores = {} # 查询词哈希 -> 入队时的最高分
+        self.expanded = set() # 已经挖过的查询词哈希
+        self.live = 0 # 还在排队的查询词数 (heap 里还有被取代的旧条目)
+
+    @staticmethod
+    def key(query):
+        return int.from_bytes(hashlib.blake2b(normalize_query(query).encode('utf-8'), digest_size=8).digest(), 'big')
+
+    def push(self, score, task):
+        """task = (query, seed, depth)。已挖过或已按不低于该分数入队的返回 False"""
+        key = self.key(task[0])
+        if key in self.expanded or self.scores.get(key, -1) >= score:
+            return False
+        if key not in self.scores:
+            self.live += 1
+        self.scores[key] = score
+        self.counter += 1
+        heapq.heappush(self.heap, (-score, task[2], self.counter, key, task))
+        return True
+
+    def pop(self):
+        """下一个要挖的任务；没有有效任务时返回 None"""
+        while self.heap:
+            neg_score, depth, _, key, task = heapq.heappop(self.heap)
+            if key in self.expanded or -neg_score < self.scores[key]:
+                continue # 已挖过，或是被更高分条目取代的旧条目
+            self.expanded.add(key)
+            self.live -= 1
+            return task
+        return None
+
+    def __len__(self):
+        return self.live
+
+class SuggestMiner:
+    """异步联想词挖掘: 一个长连接池，每个查询同时问 Google 和 Bing，每个来源各自限速。"""
+
+    def __init__(self, sources=None, cache=None):
+        self.sources = sources or SOURCES
+        self.cache = cache # SuggestCache 或 None
+        self.buckets = {name: TokenBucket(cfg['rate'], cfg['burst']) for name, cfg in self.sources.items()}
+        self.limiters = {name: AdaptiveLimiter() for name in self.sources}
+        self.stats = {name: Counter() for name in self.sources}
+
+    async def fetch(self, session, source_name, query):
+        """一个来源对一个查询的联想词；失败返回空列表。"""
+        url = self.sources[source_name]['url']
+        bucket = self.buckets[source_name]
+        limiter = self.limiters[source_name]
+        stats = self.stats[source_name]
+        if self.cache:
+            body = self.cache.get(source_name, query, LOCALE)
+            if body is not None:
+                try:
+                    suggestions = parse_suggestions(source_name, json.loads(body))
+                    stats['cached'] += 1 # 命中缓存: 不占令牌，不发请求
+                    return suggestions
+                except (ValueError, KeyError, TypeError):
+                    self.cache.delete(source_name, query, LOCALE) # 坏记录: 删掉，重新请求
+        for attempt in range(RETRIES + 1):
+            delay = 0.5 * (2 ** attempt)
+            await bucket.acquire()
+            async with limiter:
+                stats['requests'] += 1
+                started = time.monotonic()
+                try:
+                    headers = {'User-Agent': random.choice(USER_AGENTS)}
+                    async with session.get(url, params=build_params(source_name, query), headers=headers) as response:
+                        if response.status == 429 or response.status >= 500:
+                            retry_after = response.headers.get('Retry-After', '')
+                            if retry_after.isdigit():
+                                delay = max(delay, min(int(retry_after), 60))
+                            stats['throttled'] += 1
+                            limiter.record(time.monotonic() - started, throttled=True)
+                            bucket.pause(delay)
+                            continue
+                        if response.status != 200:
+                            stats['failed'] += 1
+                            return []
+                        body = await response.text()
+                        limiter.record(time.monotonic() - started)
+                        # 先解析校验再写缓存，格式不对的响应不会让之后每次运行都出错
+                        suggestions = parse_suggestions(source_name, json.loads(body))
+                        if self.cache:
+                            self.cache.put(source_name, query, LOCALE, body)
+                        return suggestions
+                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                    stats['errors'] += 1
+                    limiter.record(time.monotonic() - started, throttled=True)
+                except (ValueError, KeyError, TypeError):
+                    stats['failed'] += 1 # 返回的不是预期的 JSON
+                    return []
+            await asyncio.sleep(delay)
+        stats['failed'] += 1
+        return []
+
+    async def mine_query(self, session, query):
+        """同时向所有来源查询，返回 {来源: [联想词]}"""
+        names = list(self.sources)
+        results = await asyncio.gather(*(self.fetch(session, name, query) for name in names))
+        return dict(zip(names, results))
+
+    def requests_used(self):
+        return sum(stats['requests'] for stats in self.stats.values())
+
+    async def run(self, frontier, on_result, max_nodes=MAX_NODES, max_requests=MAX_REQUESTS):
+        """从 frontier 取任务挖，直到队列挖空或用完预算。
+
+        每个任务完成时调用 on_result(task, {来源: [联想词]})，它可以往 frontier 里
+        加新任务。请求预算在发起新查询前检查，重试可能让实际请求数略微超出。
+        """
+        condition = asyncio.Condition()
+        in_flight = 0
+        expanded = 0
+
+        def exhausted():
+            # 进行中的查询按每个来源一次请求预估，避免并发把预算冲过头
+            return (expanded + in_flight >= max_nodes
+                    or self.requests_used() + in_flight * len(self.sources) >= max_requests)
+
+        connector = aiohttp.TCPConnector(limit=MAX_CONCURRENCY * len(self.sources), ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            with tqdm(desc="Mining", unit="query", ncols=100) as pbar:
+                async def worker():
+                    nonlocal in_flight, expanded
+                    while True:
+                        async with condition:
+                            # 队列暂时空了但还有查询在跑时，等它们带回新的词
+                            await condition.wait_for(lambda: len(frontier) or in_flight == 0 or exhausted())
+                            if exhausted():
+                                return
+                            task = frontier.pop()
+                            if task is None:
+                                if in_flight == 0:
+                                    return
+                                continue
+                            in_flight += 1
+                        try:
+                            on_result(task, await self.mine_query(session, task[0]))
+                        finally:
+                            async with condition:
+                                in_flight -= 1
+                                expanded += 1
+                                pbar.update(1)
+                                condition.notify_all()
+
+                await asyncio.gather(*(worker() for _ in range(MAX_WORKERS)))
+        return expanded
+
+def make_collector(frontier, temp_storage, depth_counts, max_depth):
+    """SuggestMiner.run 的 on_result: 记录每个联想词的来源和种子，不到 max_depth 层时把它们作为下一层查询入队。
+
+    temp_storage 格式: { "关键词": { "sources": {"Google", "Bing"}, "seed": "xxx" } }
     """
-    query, seed = task
-    results = []
-    
-    # 挖 Google
-    g_results = mine_google(query)
-    for kw in g_results:
-        results.append({'kw': kw, 'source': 'Google', 'seed': seed})
-        
-    # 挖 Bing
-    b_results = mine_bing(query)
-    for kw in b_results:
-        results.append({'kw': kw, 'source': 'Bing', 'seed': seed})
-        
-    return results
+    def collect(task, results):
+        query, seed, depth = task
+        depth_counts[depth] += 1
+        for src, keywords in results.items():
+            for kw in keywords:
+                # 记录数据
+                temp_storage[kw]['sources'].add(src)
+                # 记录来源种子 (保留第一个遇到的即可)
+                if not temp_storage[kw]['seed']:
+                    temp_storage[kw]['seed'] = seed
+        if depth < max_depth:
+            # 挖出来的词作为下一层查询；分数用目前为止所有平台的推荐情况
+            for kw in set(kw for keywords in results.values() for kw in keywords):
+                frontier.push(keyword_score(kw, temp_storage[kw]['sources']), (kw, temp_storage[kw]['seed'], depth + 1))
+
+    return collect
 
 def get_suffixes():
     suffixes = list(string.ascii_lowercase)
     return suffixes
 
+def filter_keywords(temp_storage):
+    """
+    核心清洗逻辑 (Smart Filtering)
+    保留中文 OR 保留(Google+Bing)共同推荐的英文热词
+    """
+    final_keywords = []
+
+    for kw, data in temp_storage.items():
+        sources = data['sources']
+        seed = data['seed']
+
+        # --- 你的核心策略 ---
+        is_chinese = contains_chinese(kw)
+        is_consensus = ('Google' in sources and 'Bing' in sources) # 两个都有
+
+        should_keep = False
+
+        if is_chinese:
+            should_keep = True # 中文直接留
+        elif is_consensus:
+            should_keep = True # 英文如果双平台推荐，说明是热词，留！
+
+        if should_keep:
+            # 存入列表，展平来源 (如果两个都有，就存两条记录，方便 Analyzer 统计热度)
+            for src in sorted(sources):
+                final_keywords.append([kw, src, seed])
+    return final_keywords
+
 def main():
+    parser = argparse.ArgumentParser(description="Mine Google/Bing search suggestions for the seeds in seeds.txt.")
+    parser.add_argument('--google-url', default=SOURCES['Google']['url'], help="Google suggest endpoint (e.g. a local stand-in server)")
+    parser.add_argument('--bing-url', default=SOURCES['Bing']['url'], help="Bing suggest endpoint (e.g. a local stand-in server)")
+    parser.add_argument('--rate', type=float, default=None, help="Requests per second per source (token bucket rate, default: 5)")
+    parser.add_argument('--cache-ttl', type=float, default=CACHE_TTL_DAYS, help=f"Reuse cached responses younger than this many days (default: {CACHE_TTL_DAYS})")
+    parser.add_argument('--no-cache', action='store_true', help="Query every source live and don't record responses")
+    parser.add_argument('--max-depth', type=int, default=MAX_DEPTH, help=f"Expand suggestions this many levels deep (0 = seeds and letter suffixes only, default: {MAX_DEPTH})")
+    parser.add_argument('--max-nodes', type=int, default=MAX_NODES, help=f"Stop after this many queries (default: {MAX_NODES})")
+    parser.add_argument('--max-requests', type=int, default=MAX_REQUESTS, help=f"Stop after this many network requests; cache hits are free (default: {MAX_REQUESTS})")
+    args = parser.parse_args()
+
     print("🚀 启动【智能共识】挖掘模式 (Consensus Mode)...")
     print("🛡️  策略：保留中文 OR 保留(Google+Bing)共同推荐的英文热词")
-    
+
     seeds = load_seeds()
     if not seeds:
         print("❌ seeds.txt 为空")
         return
 
-    # 1. 生成任务
+    # 1. 生成任务 (种子 + 字母后缀是第 0 层，挖出来的词按优先级继续往下挖)
     suffixes = get_suffixes()
-    tasks = []
+    frontier = Frontier()
     for seed in seeds:
-        tasks.append((seed, seed))
+        frontier.push(BASE_PRIORITY, (seed, seed, 0))
         for suffix in suffixes:
-            tasks.append((f"{seed} {suffix}", seed))
-            
-    print(f"📋 任务数: {len(tasks)}")
-    
+            frontier.push(BASE_PRIORITY, (f"{seed} {suffix}", seed, 0))
+
+    print(f"📋 种子任务数: {len(frontier)}，最多扩展 {args.max_depth} 层 / {args.max_nodes} 个词 / {args.max_requests} 次请求")
+
     # 2. 临时存储所有数据 (用于对比)
     # 格式: { "关键词": { "sources": {"Google", "Bing"}, "seed": "xxx" } }
     temp_storage = defaultdict(lambda: {'sources': set(), 'seed': ''})
-    
+
+    depth_counts = Counter()
+    collect = make_collector(frontier, temp_storage, depth_counts, args.max_depth)
+
     print("⏳ 正在全面挖掘 (先采集，后清洗)...")
-    
-    with tqdm(total=len(tasks), desc="Mining", unit="task", ncols=100) as pbar:
-        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
-            future_to_task = {executor.submit(mine_single_task, task): task for task in tasks}
-            
-            for future in as_completed(future_to_task):
-                try:
-                    results = future.result()
-                    if results:
-                        for item in results:
-                            kw = item['kw']
-                            src = item['source']
-                            # 记录数据
-                            temp_storage[kw]['sources'].add(src)
-                            # 记录来源种子 (保留第一个遇到的即可)
-                            if not temp_storage[kw]['seed']:
-                                temp_storage[kw]['seed'] = item['seed']
-                    pbar.update(1)
-                except:
-                    pbar.update(1)
+    sources = {
+        'Google': dict(SOURCES['Google'], url=args.google_url),
+        'Bing': dict(SOURCES['Bing'], url=args.bing_url)
+    }
+    if args.rate:
+        for cfg in sources.values():
+            cfg['rate'] = args.rate
+            cfg['burst'] = max(1, int(args.rate))
+    cache = None if args.no_cache else SuggestCache(CACHE_FILE, args.cache_ttl * 86400)
+    miner = SuggestMiner(sources, cache)
+    started = time.monotonic()
+    try:
+        expanded = asyncio.run(miner.run(frontier, collect, args.max_nodes, args.max_requests))
+    except KeyboardInterrupt:
+        # 已拿到的响应都在缓存里，重新运行会直接从缓存继续
+        print("\n⏸️  已中断，进度已保存到缓存，重新运行即可从断点继续")
+        return
+    finally:
+        if cache:
+            cache.prune()
+            cache.close()
+    elapsed = time.monotonic() - started
+    for name, stats in miner.stats.items():
+        limiter = miner.limiters[name]
+        print(f"📡 {name}: {stats['requests']} 次请求, {stats['cached']} 次命中缓存, {stats['throttled']} 次限流, "
+              f"{stats['errors']} 次网络错误, {stats['failed']} 次失败, 并发上限 {int(limiter.limit)} (降速 {limiter.backoffs} 次)")
+    requests_used = miner.requests_used()
+    print(f"🌳 查询了 {expanded} 个词 (各层: {', '.join(f'{d}层 {n}' for d, n in sorted(depth_counts.items()))})，"
+          f"队列里还剩 {len(frontier)} 个")
+    print(f"⏱️  用时 {elapsed:.1f}s，{requests_used} 次网络请求"
+          + (f"，每次请求得到 {len(temp_storage) / requests_used:.2f} 个新词" if requests_used else ''))
 
     # 3. 核心清洗逻辑 (Smart Filtering)
     print(f"\n🧹 正在清洗数据 (原始数据量: {len(temp_storage)})...")
-    final_keywords = []
-    
-    for kw, data in temp_storage.items():
-        sources = data['sources']
-        seed = data['seed']
-        
-        # --- 你的核心策略 ---
-        is_chinese = contains_chinese(kw)
-        is_consensus = ('Google' in sources and 'Bing' in sources) # 两个都有
-        
-        should_keep = False
-        
-        if is_chinese:
-            should_keep = True # 中文直接留
-        elif is_consensus:
-            should_keep = True # 英文如果双平台推荐，说明是热词，留！
-        
-        if should_keep:
-            # 存入列表，展平来源 (如果两个都有，就存两条记录，方便 Analyzer 统计热度)
-            for src in sources:
-                final_keywords.append([kw, src, seed])
+    final_keywords = filter_keywords(temp_storage)
 
     print(f"✨ 清洗完成！保留了 {len(final_keywords)} 条【高价值】数据")
     print(f"🗑️  丢弃了 {len(temp_storage) - len(set(x[0] for x in final_keywords))} 条【单平台英文噪音】")
@@ -185,4 +525,4 @@ def main():
         print("⚠️ 未保留任何数据")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,94 @@
+# Dependencies:
+# pip install aiohttp
+#
+# 本地联想词替身服务器: 模拟 Google / Bing 联想接口，用来测试 miner.py 的限速、重试和缓存，
+# 不碰真实接口。用法:
+#   python suggest_standin.py --port 8781 --max-in-flight 6
+#   python miner.py --google-url http://127.0.0.1:8781/complete/search --bing-url http://127.0.0.1:8781/osjson.aspx --rate 20
+
+import asyncio
+import json
+import time
+import argparse
+from collections import Counter, defaultdict
+from aiohttp import web
+
+# ==========================================
+# 🔧 配置区域
+# ==========================================
+DEFAULT_PORT = 8781
+MAX_QUERY_WORDS = 4 # 查询词达到这么多个词就不再返回联想词，多层扩展会自然结束
+SUGGESTION_SUFFIXES = {
+    'Google': ['教程', 'price'],
+    'Bing': ['price', '下载'] # 'price' 两边都有，用来测试共识
+}
+
+# ==========================================
+# 🛠️ 核心功能
+# ==========================================
+
+def suggestions_for(source_name, query):
+    if len(query.split()) >= MAX_QUERY_WORDS:
+        return []
+    return [f"{query} {suffix}" for suffix in SUGGESTION_SUFFIXES[source_name]]
+
+STATE_KEY = web.AppKey('state', dict)
+
+def make_app(max_in_flight=None, throttle_first=None, retry_after=1, delay=0.0, body=None):
+    """替身服务器的 aiohttp 应用。
+
+    max_in_flight: 某个来源同时进行的请求超过这个数就回 429 (None = 不限)
+    throttle_first: {来源: n}，该来源的前 n 个请求固定回 429
+    retry_after: 429 响应带的 Retry-After 秒数 (None = 不带)
+    delay: 每个正常响应前等待的秒数
+    body: 固定返回的响应体 (比如 'null'，测试格式不对的 JSON)
+    请求记录在 app[STATE_KEY] 里: hits / throttled / peak 计数，times 是每个来源的请求时间点。
+    """
+    state = {'hits': Counter(), 'throttled': Counter(), 'in_flight': Counter(), 'peak': Counter(),
+             'times': defaultdict(list)}
+
+    def handler(source_name, param):
+        async def handle(request):
+            state['hits'][source_name] += 1
+            state['times'][source_name].append(time.monotonic())
+            state['in_flight'][source_name] += 1
+            state['peak'][source_name] = max(state['peak'][source_name], state['in_flight'][source_name])
+            try:
+                over_limit = max_in_flight is not None and state['in_flight'][source_name] > max_in_flight
+                if state['hits'][source_name] <= (throttle_first or {}).get(source_name, 0) or over_limit:
+                    state['throttled'][source_name] += 1
+                    headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+                    return web.Response(status=429, headers=headers)
+                if delay:
+                    await asyncio.sleep(delay)
+                query = request.query.get(param, '')
+                text = body if body is not None else json.dumps([query, suggestions_for(source_name, query)], ensure_ascii=False)
+                return web.Response(text=text, content_type='application/json')
+            finally:
+                state['in_flight'][source_name] -= 1
+        return handle
+
+    async def stats(request):
+        return web.json_response({key: dict(value) for key, value in state.items() if key != 'times'})
+
+    app = web.Application()
+    app[STATE_KEY] = state
+    app.router.add_get('/complete/search', handler('Google', 'q'))
+    app.router.add_get('/osjson.aspx', handler('Bing', 'query'))
+    app.router.add_get('/stats', stats)
+    return app
+
+def main():
+    parser = argparse.ArgumentParser(description="Local stand-in for the Google/Bing suggest endpoints used by miner.py.")
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--max-in-flight', type=int, default=None, help="Answer 429 above this many concurrent requests per source")
+    parser.add_argument('--retry-after', type=int, default=1, help="Retry-After seconds on 429 responses")
+    parser.add_argument('--delay', type=float, default=0.05, help="Seconds before each normal response")
+    args = parser.parse_args()
+
+    print(f"🧪 替身服务器: http://127.0.0.1:{args.port} (统计: /stats)")
+    web.run_app(make_app(args.max_in_flight, retry_after=args.retry_after, delay=args.delay),
+                host='127.0.0.1', port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
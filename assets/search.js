@@ -0,0 +1,133 @@
+// Client-side search over the sharded index written by build.py (update_search_index)
+(function () {
+  var TOKEN_RE = /[\u3400-\u9fff\uf900-\ufaff]+|[a-z0-9]+/g;
+  var MAX_RESULTS = 20;
+  var meta = null;
+  var shardCache = {};
+
+  // Must match tokenize_search_text() in build.py
+  function tokenize(text) {
+    var tokens = [];
+    var runs = text.toLowerCase().match(TOKEN_RE) || [];
+    runs.forEach(function (run) {
+      if (run.charCodeAt(0) < 128) {
+        if (run.length > 1 || /^\d+$/.test(run)) tokens.push(run);
+        return;
+      }
+      var chars = Array.from(run);
+      chars.forEach(function (c) { tokens.push(c); });
+      for (var i = 0; i < chars.length - 1; i++) tokens.push(chars[i] + chars[i + 1]);
+    });
+    return tokens;
+  }
+
+  function loadMeta() {
+    if (!meta) {
+      meta = fetch('/assets/search-index/index.json').then(function (r) { return r.json(); });
+    }
+    return meta;
+  }
+
+  function loadShard(index, version) {
+    if (!shardCache[index]) {
+      shardCache[index] = fetch('/assets/search-index/shard-' + index + '.json?v=' + version).then(function (r) { return r.json(); });
+    }
+    return shardCache[index];
+  }
+
+  function search(query) {
+    var terms = Array.from(new Set(tokenize(query)));
+    if (!terms.length) return Promise.resolve([]);
+
+    return loadMeta().then(function (index) {
+      // Only fetch the shards this query's terms live in
+      var needed = Array.from(new Set(terms.map(function (t) { return t.codePointAt(0) % index.shards; })));
+      return Promise.all(needed.map(function (i) { return loadShard(i, index.version); })).then(function (loaded) {
+        var shards = {};
+        needed.forEach(function (i, n) { shards[i] = loaded[n]; });
+
+        var scores = {};
+        var total = index.docs.length;
+        terms.forEach(function (term) {
+          var postings = shards[term.codePointAt(0) % index.shards][term];
+          if (!postings) return;
+          var df = postings.length / 2;
+          var idf = Math.log(1 + total / df);
+          var docId = 0;
+          for (var i = 0; i < postings.length; i += 2) {
+            docId += postings[i];
+            scores[docId] = (scores[docId] || 0) + idf * Math.log(1 + postings[i + 1]);
+          }
+        });
+
+        return Object.keys(scores)
+          .sort(function (a, b) { return scores[b] - scores[a]; })
+          .slice(0, MAX_RESULTS)
+          .map(function (id) { return index.docs[id]; });
+      });
+    });
+  }
+
+  function render(container, status, query, docs) {
+    container.textContent = '';
+    if (!query) {
+      status.textContent = '';
+      return;
+    }
+    status.textContent = docs.length ? '找到 ' + docs.length + ' 篇相关文章' : '没有找到与“' + query + '”相关的文章';
+    docs.forEach(function (doc) {
+      var a = document.createElement('a');
+      a.href = doc[0];
+      a.className = 'block p-6 rounded-2xl bg-[#151515] border border-white/5 hover:border-red-500/30 transition';
+      var h2 = document.createElement('h2');
+      h2.className = 'text-lg font-bold text-white mb-2';
+      h2.textContent = doc[1];
+      var p = document.createElement('p');
+      p.className = 'text-sm text-gray-400 line-clamp-2';
+      p.textContent = doc[2];
+      var date = document.createElement('span');
+      date.className = 'mt-3 block text-xs text-gray-500';
+      date.textContent = doc[3];
+      a.appendChild(h2);
+      a.appendChild(p);
+      a.appendChild(date);
+      container.appendChild(a);
+    });
+  }
+
+  document.addEventListener('DOMContentLoaded', function () {
+    var form = document.querySelector('[data-search-form]');
+    var input = document.querySelector('[data-search-input]');
+    var results = document.querySelector('[data-search-results]');
+    var status = document.querySelector('[data-search-status]');
+    // Pages without a results container just submit the form to /search
+    if (!form || !input || !results || !status) return;
+
+    var timer = null;
+    var latest = 0;
+    function run() {
+      var query = input.value.trim();
+      var ticket = ++latest;
+      var url = new URL(window.location.href);
+      if (query) url.searchParams.set('q', query); else url.searchParams.delete('q');
+      history.replaceState(null, '', url);
+      search(query).then(function (docs) {
+        if (ticket === latest) render(results, status, query, docs);
+      }).catch(function () {
+        status.textContent = '搜索索引加载失败，请稍后重试。';
+      });
+    }
+
+    form.addEventListener('submit', function (e) {
+      e.preventDefault();
+      run();
+    });
+    input.addEventListener('input', function () {
+      clearTimeout(timer);
+      timer = setTimeout(run, 150);
+    });
+
+    input.value = new URLSearchParams(window.location.search).get('q') || '';
+    if (input.value) run();
+  });
+})();
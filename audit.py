@@ -1,18 +1,94 @@
 import os
 import sys
 import re
+import json
+import hashlib
+import sqlite3
+import argparse
+import contextlib
 import concurrent.futures
-import requests
 from bs4 import BeautifulSoup
 from urllib.parse import urlparse, urljoin, unquote
 from colorama import init, Fore, Style
 from collections import defaultdict, Counter
+from link_checker import LinkChecker, LinkCache
+from link_graph import build_graph, pagerank, click_depths, fallback_is_slow
+from minhash import near_duplicates
+from page_checks import PAGE_CHECKS, LinkCheck, run_checks, soup_elements, stream_elements
+from crawler import SiteCrawler
+from report import ReportSink
+from redirects import RedirectMap, is_site_path
 
 # Initialize colorama
 init(autoreset=True)
 
+# Bump when analyze_page changes what it reports, so cached page results are discarded
+ANALYSIS_VERSION = 6
+
+# Worker-process state for parallel page analysis (see SEOAudit.analyze_pages)
+_worker_audit = None
+
+def _init_worker(audit):
+    global _worker_audit
+    _worker_audit = audit
+
+def _analyze_in_worker(paths):
+    return _worker_audit.analyze_page(*paths)
+
+class PageCache:
+    """Per-page analysis results from the previous audit run, keyed by content hash."""
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS pages (rel_path TEXT PRIMARY KEY, hash TEXT NOT NULL, result TEXT NOT NULL)")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL)")
+
+    def get_meta(self, key):
+        row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def set_meta(self, key, value):
+        self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, json.dumps(value)))
+
+    def changed_files(self, fingerprint, site_files):
+        """Site files (relative paths) added or removed since the last run.
+
+        Returns None when the cache is empty or was written with a different
+        configuration, in which case every page has to be analyzed again.
+        """
+        previous = self.get_meta('site_files')
+        if previous is None or self.get_meta('fingerprint') != fingerprint:
+            self.conn.execute("DELETE FROM pages")
+            return None
+        return set(previous) ^ site_files
+
+    def hashes(self):
+        return dict(self.conn.execute("SELECT rel_path, hash FROM pages"))
+
+    def get(self, rel_path, page_hash):
+        row = self.conn.execute("SELECT hash, result FROM pages WHERE rel_path = ?", (rel_path,)).fetchone()
+        if not row or row[0] != page_hash:
+            return None
+        return json.loads(row[1])
+
+    def put(self, rel_path, page_hash, result):
+        self.conn.execute("INSERT OR REPLACE INTO pages (rel_path, hash, result) VALUES (?, ?, ?)",
+                          (rel_path, page_hash, json.dumps(result, ensure_ascii=False)))
+
+    def save(self, fingerprint, site_files, pages):
+        # Forget pages that were deleted or are no longer scanned
+        stale = {row[0] for row in self.conn.execute("SELECT rel_path FROM pages")} - set(pages)
+        self.conn.executemany("DELETE FROM pages WHERE rel_path = ?", ((p,) for p in stale))
+        self.set_meta('fingerprint', fingerprint)
+        self.set_meta('site_files', sorted(site_files))
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
 class SEOAudit:
-    def __init__(self, root_dir='.'):
+    def __init__(self, root_dir='.', workers=None, link_cache_path='', page_cache_path=''):
         self.root_dir = os.path.abspath(root_dir)
         self.base_url = None
         self.keywords = []
@@ -20,13 +96,54 @@ class SEOAudit:
         self.internal_links_map = defaultdict(list) # target -> [sources]
         self.external_links = set() # (url, source_file)
         self.pages_data = {} # path -> {title, h1, schema, etc}
+        self.site_files = None # every servable file path, built once by scan_files
+        self.resolve_cache = {} # (base dir or None, clean href) -> resolved path or None
+        self.documents = {} # full path -> (html text, soup) handed over by the builder, see attach_build
+        self.redirect_map = RedirectMap() # Compiled _redirects rules, loaded by scan_files
+        self.redirect_links = defaultdict(list) # site path served by a redirect rule -> [sources]
         self.score = 100
-        self.issues = []
+        self.report = ReportSink() # Issue counters; see open_report for JSON Lines / SARIF output
         
         # Configuration
-        self.ignore_paths = ['.git', 'node_modules', '__pycache__', '.vscode', '.idea', 'MasterTool']
-        self.ignore_url_prefixes = ['/go/', 'javascript:', 'mailto:', '#']
+        self.ignore_paths = ['.git', 'node_modules', '__pycache__', '.vscode', '.idea', 'MasterTool', '.audit_cache']
+        self.ignore_url_prefixes = ['javascript:', 'mailto:', '#']
+        self.redirect_url_prefixes = ['/go/'] # Intentional redirects (affiliate links); other internal links should not redirect
         self.ignore_filenames = ['google', '404.html'] # Partial match
+        self.page_checks = list(PAGE_CHECKS) # Check classes run on every page (see page_checks.py)
+        self.parser = 'soup' # 'stream' scans pages with HTMLParser events instead of building a BeautifulSoup tree
+        self.workers = workers or os.cpu_count() or 1
+        self.parallel_threshold = 50 # Below this many pages, process startup costs more than it saves
+        self.mp_context = None # multiprocessing context for the worker pool; None uses the platform default
+        self.money_url_prefixes = ['/go/'] # Pages linking here are conversion (money) pages
+        self.money_pages = [] # Extra money pages (rel paths) that carry no such link
+        self.max_click_depth = 3 # Pages further than this many clicks from the home page get flagged
+        self.near_duplicate_threshold = 0.8 # Estimated Jaccard similarity of main text shingles
+        self.near_duplicate_min_shingles = 50 # Pages with less text than this are too thin to compare
+        # Per-page performance budgets; exceeding one deducts from the score and fails the run
+        self.performance_budgets = {
+            'html_bytes': 150 * 1024,
+            'html_gzip_bytes': 40 * 1024,
+            'render_blocking': 2, # External scripts/stylesheets in <head> without async/defer/media=print
+            'third_party_origins': 4,
+            'image_bytes': 1024 * 1024
+        }
+        self.crawl_options = {'concurrency': 8, 'max_pages': 5000, 'timeout': 10}
+        self.slow_ttfb = 0.6 # Seconds; crawled pages answering slower than this get flagged
+        self.link_checker_options = {'timeout': 5, 'concurrency': 20, 'per_host': 4, 'per_host_interval': 0.25, 'retries': 2}
+
+        # External link cache (None disables it)
+        if link_cache_path == '':
+            link_cache_path = os.path.join(self.root_dir, '.audit_cache', 'links.sqlite')
+        self.link_cache_path = link_cache_path
+        self.link_cache_ttls = {} # Overrides for link_checker.DEFAULT_CACHE_TTLS, per outcome class
+        self.link_cache_max_age = 30 * 86400 # Entries unchecked for this long are dropped
+        self.link_cache_stats = {'hits': 0, 'revalidated': 0, 'misses': 0}
+
+        # Incremental analysis: unchanged pages reuse their previous results (None disables it)
+        if page_cache_path == '':
+            page_cache_path = os.path.join(self.root_dir, '.audit_cache', 'pages.sqlite')
+        self.page_cache_path = page_cache_path
+        self.page_cache_stats = {'reused': 0, 'relinked': 0, 'analyzed': 0}
         
         # Counters
         self.stats = {
@@ -34,10 +151,29 @@ class SEOAudit:
             'internal_links': 0,
             'external_links': 0,
             'dead_links': 0,
-            'orphans': 0
+            'redirect_links': 0,
+            'orphans': 0,
+            'deep_pages': 0,
+            'starved_money_pages': 0,
+            'duplicates': 0,
+            'budget_failures': 0
         }
+        self.detected_money_pages = set()
+        self.page_content = {} # rel path -> {title, description, shingles, signature}
+        self.page_performance = {} # rel path -> PerformanceCheck record
+
+    def __getstate__(self):
+        # Worker processes receive a pickled copy (spawn/forkserver); open report files and
+        # builder soups stay in this process, and workers only analyze pages from disk anyway
+        state = self.__dict__.copy()
+        state.update(report=ReportSink(), documents={}, mp_context=None)
+        return state
 
-    def log(self, level, message, score_deduction=0):
+    def open_report(self, jsonl_path=None, sarif_path=None):
+        # Stream every issue to files as it is found, for CI and other tools
+        self.report = ReportSink(jsonl_path, sarif_path)
+
+    def log(self, level, message, score_deduction=0, rule=None, page=None):
         if level == 'SUCCESS':
             print(f"{Fore.GREEN}[SUCCESS]{Style.RESET_ALL} {message}")
         elif level == 'ERROR':
@@ -49,40 +185,60 @@ class SEOAudit:
         elif level == 'INFO':
             print(f"{Fore.BLUE}[INFO]{Style.RESET_ALL} {message}")
         
-        if score_deduction > 0:
-            self.issues.append(f"[{level}] {message} (-{score_deduction})")
+        if level in ('WARN', 'ERROR'):
+            self.report.add(level, rule or 'general', message, page, score_deduction)
+
+    def attach_build(self, builder):
+        """Audit a BlogBuilder's in-memory output instead of re-reading it.
+
+        Pages the builder wrote are checked from its final soups and serialized
+        HTML, and its clean URL -> file table seeds link resolution, so both
+        sides agree on which file serves each URL.
+        """
+        self.documents = builder.documents
+        for url, path in builder.url_table.items():
+            self.resolve_cache[(None, url)] = path
+
+    def read_page_bytes(self, full_path):
+        if full_path in self.documents:
+            return self.documents[full_path][0].encode('utf-8')
+        with open(full_path, 'rb') as f:
+            return f.read()
 
     def auto_configure(self):
         index_path = os.path.join(self.root_dir, 'index.html')
         if not os.path.exists(index_path):
-            self.log('WARN', "Root index.html not found. Cannot auto-configure Base URL.", 0)
+            self.log('WARN', "Root index.html not found. Cannot auto-configure Base URL.", 0, rule='config')
             return
 
         try:
-            with open(index_path, 'r', encoding='utf-8', errors='ignore') as f:
-                soup = BeautifulSoup(f, 'html.parser')
-                
-                # Base URL
-                canonical = soup.find('link', rel='canonical')
-                if canonical and canonical.get('href'):
-                    self.base_url = canonical['href'].rstrip('/')
-                    self.log('SUCCESS', f"Base URL detected: {self.base_url}")
+            if index_path in self.documents:
+                soup = self.documents[index_path][1]
+            else:
+                with open(index_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    soup = BeautifulSoup(f, 'html.parser')
+
+            # Base URL
+            canonical = soup.find('link', rel='canonical')
+            if canonical and canonical.get('href'):
+                self.base_url = canonical['href'].rstrip('/')
+                self.log('SUCCESS', f"Base URL detected: {self.base_url}")
+            else:
+                og_url = soup.find('meta', property='og:url')
+                if og_url and og_url.get('content'):
+                    self.base_url = og_url['content'].rstrip('/')
+                    self.log('SUCCESS', f"Base URL detected from og:url: {self.base_url}")
                 else:
-                    og_url = soup.find('meta', property='og:url')
-                    if og_url and og_url.get('content'):
-                        self.base_url = og_url['content'].rstrip('/')
-                        self.log('SUCCESS', f"Base URL detected from og:url: {self.base_url}")
-                    else:
-                        self.log('WARN', "Could not detect Base URL (checked canonical and og:url).")
-
-                # Keywords
-                meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
-                if meta_keywords and meta_keywords.get('content'):
-                    self.keywords = [k.strip() for k in meta_keywords['content'].split(',')]
-                    self.log('INFO', f"Keywords detected: {', '.join(self.keywords)}")
-                    
+                    self.log('WARN', "Could not detect Base URL (checked canonical and og:url).", rule='config')
+
+            # Keywords
+            meta_keywords = soup.find('meta', attrs={'name': 'keywords'})
+            if meta_keywords and meta_keywords.get('content'):
+                self.keywords = [k.strip() for k in meta_keywords['content'].split(',')]
+                self.log('INFO', f"Keywords detected: {', '.join(self.keywords)}")
+                
         except Exception as e:
-            self.log('ERROR', f"Failed to parse index.html for configuration: {str(e)}")
+            self.log('ERROR', f"Failed to parse index.html for configuration: {str(e)}", rule='config')
 
     def is_ignored_path(self, path):
         for ignore in self.ignore_paths:
@@ -96,12 +252,24 @@ class SEOAudit:
                 return True
         return False
 
+    def index_site_files(self):
+        # Standalone index for callers that resolve links without a scan_files pass
+        self.site_files = set()
+        for root, dirs, files in os.walk(self.root_dir):
+            dirs[:] = [d for d in dirs if d not in self.ignore_paths]
+            for file in files:
+                self.site_files.add(os.path.join(root, file))
+
     def scan_files(self):
+        self.redirect_map = RedirectMap.load(os.path.join(self.root_dir, '_redirects'))
+        self.site_files = set()
         for root, dirs, files in os.walk(self.root_dir):
             # Modify dirs in-place to skip ignored directories
             dirs[:] = [d for d in dirs if d not in self.ignore_paths]
             
             for file in files:
+                # Index every servable file so link resolution never touches the filesystem
+                self.site_files.add(os.path.join(root, file))
                 if not file.endswith('.html'):
                     continue
                 if self.is_ignored_file(file):
@@ -113,7 +281,8 @@ class SEOAudit:
 
         self.log('INFO', f"Found {len(self.files_to_scan)} HTML files to scan.")
 
-    def resolve_local_path(self, current_file_path, href):
+    def link_candidates(self, current_file_path, href):
+        """Return (cache_key, candidate paths) for a local href, or None if there is nothing to resolve."""
         # Remove hash and query params
         href_clean = href.split('#')[0].split('?')[0]
         
@@ -126,29 +295,48 @@ class SEOAudit:
             if not href_clean.startswith('/'):
                 href_clean = '/' + href_clean
         
-        target_path = None
-        
         if href_clean.startswith('/'):
             # Absolute path relative to root
-            potential_path = os.path.join(self.root_dir, href_clean.lstrip('/'))
+            cache_key = (None, href_clean)
+            potential_path = os.path.normpath(os.path.join(self.root_dir, href_clean.lstrip('/')))
         else:
             # Relative path
-            potential_path = os.path.join(os.path.dirname(current_file_path), href_clean)
+            cache_key = (os.path.dirname(current_file_path), href_clean)
+            potential_path = os.path.normpath(os.path.join(cache_key[0], href_clean))
 
-        # Check existence strategies
-        # 1. Exact match (rare for clean URLs but possible)
-        if os.path.isfile(potential_path):
-            return potential_path
-            
-        # 2. Append .html
-        if os.path.isfile(potential_path + '.html'):
-            return potential_path + '.html'
-            
-        # 3. Directory index (folder/index.html)
-        if os.path.isdir(potential_path) and os.path.isfile(os.path.join(potential_path, 'index.html')):
-            return os.path.join(potential_path, 'index.html')
-            
-        return None # Not found
+        # Check existence strategies (a trailing slash only matches a directory index)
+        candidates = []
+        if not href_clean.endswith('/'):
+            candidates.append(potential_path) # 1. Exact match (rare for clean URLs but possible)
+            candidates.append(potential_path + '.html') # 2. Append .html
+        candidates.append(os.path.join(potential_path, 'index.html')) # 3. Directory index (folder/index.html)
+        return cache_key, candidates
+
+    def resolve_local_path(self, current_file_path, href):
+        resolution = self.link_candidates(current_file_path, href)
+        if resolution is None:
+            return None
+        cache_key, candidates = resolution
+
+        # The same nav/footer hrefs repeat on every page
+        if cache_key in self.resolve_cache:
+            return self.resolve_cache[cache_key]
+
+        if self.site_files is None:
+            self.index_site_files()
+
+        resolved = next((c for c in candidates if c in self.site_files), None)
+        self.resolve_cache[cache_key] = resolved
+        return resolved
+
+    def site_path(self, rel_file_path, href):
+        # URL path an href points to, as matched against _redirects sources
+        href_clean = href.split('#')[0].split('?')[0]
+        if self.base_url and href_clean.startswith(self.base_url):
+            href_clean = href_clean[len(self.base_url):] or '/'
+        if not href_clean:
+            return None
+        return urljoin('/' + rel_file_path.replace(os.sep, '/'), href_clean)
 
     def check_link_format(self, href, rel_file_path):
         issues = []
@@ -169,94 +357,269 @@ class SEOAudit:
              
         return issues
 
+    def new_page_result(self, rel_path):
+        return {
+            'rel_path': rel_path,
+            'scanned': False,
+            'logs': [], # (level, message, score_deduction) for page-level checks
+            'internal_links': [], # [href, format issues, resolved target rel path or None], in document order
+            'external_links': [], # hrefs, one per occurrence
+            'money_links': 0, # links to money_url_prefixes
+            'title': None,
+            'description': None,
+            'content_shingles': 0, # distinct shingles in the main text
+            'content_signature': None, # MinHash signature of the main text
+            'performance': None, # see page_checks.PerformanceCheck
+            'error': None
+        }
+
     def analyze_page(self, full_path, rel_path):
+        """Analyze one page without touching shared state.
+
+        Returns a JSON-serializable result dict that merge_page_result folds
+        into the audit, so pages can be analyzed in worker processes, merged in
+        a fixed order, and reused by later runs while the file is unchanged.
+        """
+        result = self.new_page_result(rel_path)
+
         try:
+            if full_path in self.documents:
+                # Fresh from the builder: walk its final tree, no I/O or parsing
+                result['scanned'] = True
+                run_checks(self, full_path, result, soup_elements(self.documents[full_path][1]))
+                return result
+
             with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                content = f.read()
-                soup = BeautifulSoup(content, 'html.parser')
+                if self.parser == 'stream':
+                    result['scanned'] = True
+                    # Checks run while the file is read, no tree is built
+                    run_checks(self, full_path, result, stream_elements(f))
+                else:
+                    content = f.read()
+                    soup = BeautifulSoup(content, 'html.parser')
+                    result['scanned'] = True
+                    # Every registered check sees the elements it asked for during one walk of the tree
+                    run_checks(self, full_path, result, soup_elements(soup))
+
+        except Exception as e:
+            result['error'] = f"Failed to analyze {rel_path}: {str(e)}"
+
+        return result
 
+    def merge_page_result(self, result):
+        rel_path = result['rel_path']
+        if result['scanned']:
             self.stats['pages_scanned'] += 1
-            
-            # --- Semantics Checks ---
-            
-            # H1 Check
-            h1s = soup.find_all('h1')
-            if len(h1s) == 0:
-                self.log('ERROR', f"{rel_path}: Missing <h1> tag", 5)
-            elif len(h1s) > 1:
-                self.log('WARN', f"{rel_path}: Multiple <h1> tags found", 2)
-            
-            # Schema Check
-            schemas = soup.find_all('script', type='application/ld+json')
-            if not schemas:
-                self.log('WARN', f"{rel_path}: Missing JSON-LD Schema", 2)
-                
-            # Breadcrumb Check
-            breadcrumb = soup.find(attrs={"aria-label": "breadcrumb"}) or soup.find(class_=lambda c: c and 'breadcrumb' in c)
-            if not breadcrumb and rel_path != 'index.html': # Skip for home
-                 self.log('WARN', f"{rel_path}: Missing Breadcrumb", 0) # Just log, maybe not critical for all pages
-
-            # --- Link Analysis ---
-            links = soup.find_all('a', href=True)
-            for link in links:
-                href = link['href'].strip()
-                
-                # Skip ignored
-                if any(href.startswith(p) for p in self.ignore_url_prefixes) or 'cdn-cgi' in href:
-                    continue
+        for level, message, score_deduction, rule in result['logs']:
+            self.log(level, message, score_deduction, rule, rel_path)
 
-                if href.startswith('http://') or href.startswith('https://'):
-                    # External Link
-                    if self.base_url and href.startswith(self.base_url):
-                        # Technically internal but written as full URL
-                        pass # Will be handled by check_link_format and resolve logic below if we treat it as local
-                    else:
-                        self.external_links.add((href, rel_path))
-                        self.stats['external_links'] += 1
-                        continue
-
-                self.stats['internal_links'] += 1
-                
-                # Format Checks
-                format_issues = self.check_link_format(href, rel_path)
-                for score_ded, msg in format_issues:
-                    self.log('WARN', f"{rel_path}: {msg}", score_ded)
+        for href, format_issues, target_rel in result['internal_links']:
+            self.stats['internal_links'] += 1
+            for score_ded, msg in format_issues:
+                self.log('WARN', f"{rel_path}: {msg}", score_ded, 'link-format', rel_path)
+            if target_rel:
+                # Map for equity
+                self.internal_links_map[target_rel].append(rel_path)
+                continue
+            path = self.site_path(rel_path, href)
+            if path and self.redirect_map.lookup(path):
+                # No file, but _redirects serves it; followed in analyze_redirects
+                self.redirect_links[path].append(rel_path)
+                self.stats['redirect_links'] += 1
+            else:
+                self.log('ERROR', f"{rel_path}: Dead Internal Link -> {href}", 10, 'dead-internal-link', rel_path)
+                self.stats['dead_links'] += 1
 
-                # Dead Link & Resolution
-                target_file = self.resolve_local_path(full_path, href)
-                
-                if target_file:
-                    # Map for equity
-                    target_rel = os.path.relpath(target_file, self.root_dir)
-                    self.internal_links_map[target_rel].append(rel_path)
+        if result['error']:
+            self.log('ERROR', result['error'], 0, 'analysis-error', rel_path)
+        if result['money_links']:
+            self.detected_money_pages.add(rel_path)
+        if result['performance']:
+            self.page_performance[rel_path] = result['performance']
+        if result['scanned']:
+            self.page_content[rel_path] = {
+                'title': result['title'],
+                'description': result['description'],
+                'shingles': result['content_shingles'],
+                'signature': result['content_signature']
+            }
+
+        self.stats['external_links'] += len(result['external_links'])
+        for href in result['external_links']:
+            self.external_links.add((href, rel_path))
+
+    def analysis_fingerprint(self):
+        # Anything besides the page itself that changes analyze_page output
+        return [ANALYSIS_VERSION, self.base_url, self.ignore_url_prefixes, self.ignore_filenames,
+                self.money_url_prefixes, [check.__name__ for check in self.page_checks], self.parser]
+
+    def hash_file(self, full_path):
+        try:
+            return hashlib.sha256(self.read_page_bytes(full_path)).hexdigest()
+        except OSError:
+            return None
+
+    def relink_page(self, full_path, result, changed_files):
+        """Re-resolve the links of an unchanged page that could point at a file
+        that appeared or disappeared since the last run. Returns True if any did."""
+        relinked = False
+        for link in result['internal_links']:
+            resolution = self.link_candidates(full_path, link[0])
+            if resolution and not changed_files.isdisjoint(resolution[1]):
+                target_file = self.resolve_local_path(full_path, link[0])
+                link[2] = os.path.relpath(target_file, self.root_dir) if target_file else None
+                relinked = True
+        return relinked
+
+    def analyze_pages(self):
+        pending = self.files_to_scan
+        reusable = set() # rel paths whose cached result is still valid
+        page_cache = PageCache(self.page_cache_path) if self.page_cache_path else None
+
+        if page_cache:
+            fingerprint = self.analysis_fingerprint()
+            site_files = {os.path.relpath(p, self.root_dir) for p in self.site_files}
+            changed_files = page_cache.changed_files(fingerprint, site_files)
+            if changed_files is not None:
+                changed_files = {os.path.join(self.root_dir, p) for p in changed_files}
+
+            # Only hashes are compared up front; cached results are loaded one at a time while merging
+            cached_hashes = page_cache.hashes() if changed_files is not None else {}
+            pending = []
+            page_hashes = {}
+            for full_path, rel_path in self.files_to_scan:
+                page_hashes[rel_path] = page_hash = self.hash_file(full_path)
+                if page_hash and cached_hashes.get(rel_path) == page_hash:
+                    reusable.add(rel_path)
                 else:
-                    self.log('ERROR', f"{rel_path}: Dead Internal Link -> {href}", 10)
-                    self.stats['dead_links'] += 1
+                    pending.append((full_path, rel_path))
+            del cached_hashes
 
-        except Exception as e:
-            self.log('ERROR', f"Failed to analyze {rel_path}: {str(e)}")
+        # Builder documents live in this process, so an attached build is analyzed serially
+        parallel = self.workers > 1 and len(pending) >= self.parallel_threshold and not self.documents
+        with (concurrent.futures.ProcessPoolExecutor(max_workers=self.workers, mp_context=self.mp_context,
+                                                     initializer=_init_worker, initargs=(self,))
+              if parallel else contextlib.nullcontext()) as executor:
+            if executor:
+                analyzed = executor.map(_analyze_in_worker, pending, chunksize=16)
+            else:
+                analyzed = (self.analyze_page(full_path, rel_path) for full_path, rel_path in pending)
+
+            # Results are merged in files_to_scan order as they arrive, so output and score match a
+            # serial, uncached run and each page's issues reach the report without waiting for the rest
+            for full_path, rel_path in self.files_to_scan:
+                if rel_path in reusable:
+                    result = page_cache.get(rel_path, page_hashes[rel_path])
+                    # The page is unchanged; only links into added/removed files need a fresh lookup
+                    if changed_files and self.relink_page(full_path, result, changed_files):
+                        page_cache.put(rel_path, page_hashes[rel_path], result)
+                        self.page_cache_stats['relinked'] += 1
+                    self.page_cache_stats['reused'] += 1
+                    self.merge_page_result(result)
+                    continue
+
+                result = next(analyzed)
+                self.merge_page_result(result)
+                if page_cache and page_hashes[rel_path] and not result['error']:
+                    page_cache.put(rel_path, page_hashes[rel_path], result)
+        self.page_cache_stats['analyzed'] = len(pending)
+
+        if page_cache:
+            page_cache.save(fingerprint, site_files, page_hashes)
+            page_cache.close()
+
+    def analyze_redirects(self):
+        if not self.redirect_map and not self.redirect_map.errors:
+            return
+        print(f"\n{Fore.CYAN}Checking Redirects ({len(self.redirect_map)} rules, {len(self.redirect_links)} linked)...{Style.RESET_ALL}")
+        for number, problem in self.redirect_map.errors:
+            self.log('WARN', f"_redirects line {number} ignored: {problem}", 2, 'redirects-syntax', '_redirects')
+
+        index_path = os.path.join(self.root_dir, 'index.html')
+        for path in sorted(self.redirect_links):
+            sources = sorted(set(self.redirect_links[path]))
+            linked_from = f" (linked from {', '.join(sources[:3])}{', ...' if len(sources) > 3 else ''})"
+            hops, loop = self.redirect_map.follow(path, self.base_url)
+            route = ' -> '.join([path] + [destination for _, destination, _ in hops])
+            if loop:
+                self.log('ERROR', f"Redirect Loop: {route}{linked_from}", 10, 'redirect-loop', sources[0])
+                continue
+            redirects = sum(1 for _, _, status in hops if status != 200)
+            if redirects > 1:
+                self.log('WARN', f"Redirect Chain ({redirects} hops): {route}{linked_from}", 2, 'redirect-chain', sources[0])
+
+            final = hops[-1][1]
+            if self.base_url and final.startswith(self.base_url):
+                final = final[len(self.base_url):] or '/'
+            if is_site_path(final):
+                target_file = self.resolve_local_path(index_path, final)
+                if not target_file:
+                    self.log('ERROR', f"Redirect Target Not Found: {route}{linked_from}", 10, 'dead-redirect-target', sources[0])
+                    self.stats['dead_links'] += 1
+                    continue
+                target_rel = os.path.relpath(target_file, self.root_dir)
+                # Equity flows through the redirect to the page that serves it
+                self.internal_links_map[target_rel].extend(sources)
+                if redirects and not any(path.startswith(p) for p in self.redirect_url_prefixes):
+                    self.log('WARN', f"Internal Link to Redirect: {route}{linked_from}", 2, 'internal-redirect', sources[0])
+            elif final.startswith('http://') or final.startswith('https://'):
+                # Checked with the other external links, once per target however many rules lead there
+                for source in sources:
+                    self.external_links.add((final, f"{source} (via {path})"))
 
     def check_external_links(self):
-        print(f"\n{Fore.CYAN}Checking {len(self.external_links)} external links...{Style.RESET_ALL}")
-        
-        def check_url(url_info):
-            url, source_file = url_info
-            try:
-                headers = {'User-Agent': 'SEOAuditBot/1.0'}
-                response = requests.head(url, headers=headers, timeout=5, allow_redirects=True)
-                if response.status_code >= 400:
-                    return (url, source_file, response.status_code)
-            except requests.RequestException:
-                 return (url, source_file, 'Connection Error')
-            return None
+        # Each URL is checked once, however many pages link to it
+        sources_by_url = defaultdict(list)
+        for url, source_file in sorted(self.external_links):
+            sources_by_url[url].append(source_file)
+
+        print(f"\n{Fore.CYAN}Checking {len(sources_by_url)} external links ({len(self.external_links)} references)...{Style.RESET_ALL}")
+
+        # Fresh cached results are reused; stale OK results are revalidated with conditional requests
+        cache = LinkCache(self.link_cache_path, self.link_cache_ttls) if self.link_cache_path else None
+        results = {}
+        cached_entries = {}
+        conditional_headers = {}
+        to_check = []
+        for url in sources_by_url:
+            entry = cache.get(url) if cache else None
+            if entry and cache.is_fresh(url, entry):
+                results[url] = entry
+                self.link_cache_stats['hits'] += 1
+                continue
+            to_check.append(url)
+            if entry and entry['ok'] and (entry['etag'] or entry['last_modified']):
+                cached_entries[url] = entry
+                headers = {}
+                if entry['etag']:
+                    headers['If-None-Match'] = entry['etag']
+                if entry['last_modified']:
+                    headers['If-Modified-Since'] = entry['last_modified']
+                conditional_headers[url] = headers
 
-        with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-            results = list(executor.map(check_url, self.external_links))
+        if to_check:
+            checker = LinkChecker(**self.link_checker_options)
+            for url, result in checker.check(to_check, conditional_headers).items():
+                if result['status'] == 304 and url in cached_entries:
+                    # Unchanged since the last check: keep the cached outcome, restart its TTL
+                    result = cached_entries[url]
+                    self.link_cache_stats['revalidated'] += 1
+                else:
+                    self.link_cache_stats['misses'] += 1
+                if cache:
+                    cache.put(url, result)
+                results[url] = result
+
+        if cache:
+            cache.prune(self.link_cache_max_age)
+            cache.close()
 
-        for res in results:
-            if res:
-                url, source, status = res
-                self.log('ERROR', f"{source}: Broken External Link ({status}) -> {url}", 5)
+        for url, sources in sources_by_url.items():
+            result = results[url]
+            if not result['ok']:
+                for source in sources:
+                    page = source.split(' (via ')[0] # Redirect targets are labelled "page (via /go/x)"
+                    self.log('ERROR', f"{source}: Broken External Link ({result['status']}) -> {url}", 5, 'broken-external-link', page)
 
     def analyze_equity(self):
         print(f"\n{Fore.CYAN}Analyzing Link Equity...{Style.RESET_ALL}")
@@ -267,7 +630,7 @@ class SEOAudit:
         # Orphans (In-degree = 0)
         # Exclude index.html and white listed
         orphans = []
-        for page in all_pages:
+        for page in sorted(all_pages): # Sorted so the report is reproducible
             if page == 'index.html' or self.is_ignored_file(page):
                 continue
             
@@ -278,14 +641,132 @@ class SEOAudit:
 
         if orphans:
             for orphan in orphans:
-                self.log('WARN', f"Orphan Page (No incoming links): {orphan}", 5)
+                self.log('WARN', f"Orphan Page (No incoming links): {orphan}", 5, 'orphan-page', orphan)
                 self.stats['orphans'] += 1
         
+        # PageRank and click depth over the page-to-page link graph
+        nodes, edges = build_graph(all_pages, self.internal_links_map)
+        if not nodes:
+            return
+        if fallback_is_slow(len(edges)):
+            print(f"{Fore.YELLOW}[WARN]{Style.RESET_ALL} numpy not installed: PageRank over {len(edges)} links "
+                  f"runs in pure Python and may take a while (pip install numpy)")
+        ranks = pagerank(len(nodes), edges)
+        index = {page: i for i, page in enumerate(nodes)}
+        if 'index.html' in index:
+            depths = click_depths(len(nodes), edges, index['index.html'])
+        else:
+            depths = [None] * len(nodes)
+        orphan_set = set(orphans)
+
+        for i, page in enumerate(nodes):
+            if page == 'index.html' or page in orphan_set or self.is_ignored_file(page):
+                continue
+            if depths[i] is None:
+                # Linked from somewhere, but not reachable by clicking from the home page
+                self.log('WARN', f"Unreachable from Home Page: {page}", 2, 'unreachable-page', page)
+                self.stats['deep_pages'] += 1
+            elif depths[i] > self.max_click_depth:
+                self.log('WARN', f"Deep Page ({depths[i]} clicks from home): {page}", 2, 'deep-page', page)
+                self.stats['deep_pages'] += 1
+
+        # Money pages should get at least an average share of link equity and be easy to reach
+        # (rank is shown relative to the average page, so 1.00 = average)
+        money_pages = sorted((self.detected_money_pages | set(self.money_pages)) & set(nodes))
+        for page in money_pages:
+            i = index[page]
+            relative_rank = ranks[i] * len(nodes)
+            depth = depths[i]
+            if relative_rank < 1 or depth is None or depth > self.max_click_depth:
+                depth_text = 'unreachable' if depth is None else f"depth {depth}"
+                self.log('WARN', f"Starved Money Page (PageRank {relative_rank:.2f}x avg, {depth_text}): {page}", 3, 'starved-money-page', page)
+                self.stats['starved_money_pages'] += 1
+
         # Top Pages
-        sorted_pages = sorted(self.internal_links_map.items(), key=lambda x: len(x[1]), reverse=True)
-        print(f"\n{Fore.BLUE}Top 10 Pages by Inbound Links:{Style.RESET_ALL}")
-        for page, sources in sorted_pages[:10]:
-            print(f"  - {page}: {len(sources)} links")
+        top_pages = sorted(range(len(nodes)), key=lambda i: (-ranks[i], nodes[i]))
+        print(f"\n{Fore.BLUE}Top 10 Pages by PageRank:{Style.RESET_ALL}")
+        for i in top_pages[:10]:
+            page = nodes[i]
+            depth = '-' if depths[i] is None else depths[i]
+            print(f"  - {page}: {ranks[i] * len(nodes):.2f}x avg, {len(self.internal_links_map.get(page, []))} inbound links, depth {depth}")
+
+    def analyze_duplicates(self):
+        print(f"\n{Fore.CYAN}Checking Duplicate Content...{Style.RESET_ALL}")
+
+        # Exact duplicate titles and descriptions (case-insensitive)
+        for field, label in (('title', 'Title'), ('description', 'Meta Description')):
+            groups = defaultdict(list)
+            for page in sorted(self.page_content):
+                value = self.page_content[page][field]
+                if value:
+                    groups[value.lower()].append(page)
+            for pages in groups.values():
+                if len(pages) > 1:
+                    self.log('WARN', f"Duplicate {label} on {len(pages)} pages ({', '.join(pages)}): {self.page_content[pages[0]][field]}", 2,
+                             f"duplicate-{field}", pages[0])
+                    self.stats['duplicates'] += 1
+
+        # Near-duplicate main text: MinHash signatures, compared only within shared LSH buckets
+        signatures = {
+            page: content['signature'] for page, content in self.page_content.items()
+            if content['signature'] and content['shingles'] >= self.near_duplicate_min_shingles
+        }
+        for score, page_a, page_b in near_duplicates(signatures, self.near_duplicate_threshold):
+            self.log('WARN', f"Near-duplicate Content ({score:.0%} similar): {page_a} <-> {page_b}", 3, 'near-duplicate-content', page_a)
+            self.stats['duplicates'] += 1
+
+    def image_size(self, page_path, url):
+        # Local image size in bytes, or None for remote or missing files
+        if url.startswith('data:'):
+            return len(url)
+        if url.startswith('//') or url.startswith('http://') or url.startswith('https://'):
+            if not (self.base_url and url.startswith(self.base_url)):
+                return None
+        resolution = self.link_candidates(page_path, url)
+        if resolution is None:
+            return None
+        path = resolution[1][0]
+        return os.path.getsize(path) if path in self.site_files else None
+
+    def analyze_performance(self):
+        print(f"\n{Fore.CYAN}Checking Performance Budgets...{Style.RESET_ALL}")
+        budgets = self.performance_budgets
+        totals = Counter()
+        all_origins = set()
+
+        for full_path, rel_path in self.files_to_scan:
+            perf = self.page_performance.get(rel_path)
+            if not perf:
+                continue
+            image_bytes = sum(self.image_size(full_path, url) or 0 for url in dict.fromkeys(perf['images']))
+            measured = {
+                'html_bytes': perf['html_bytes'],
+                'html_gzip_bytes': perf['html_gzip_bytes'],
+                'render_blocking': len(perf['render_blocking']),
+                'third_party_origins': len(perf['third_party_origins']),
+                'image_bytes': image_bytes
+            }
+            totals.update({k: v for k, v in measured.items() if v})
+            totals['pages'] += 1
+            all_origins.update(perf['third_party_origins'])
+
+            for name, value in measured.items():
+                limit = budgets.get(name)
+                if limit is None or value is None or value <= limit:
+                    continue
+                rule = 'over-budget-' + name.replace('_', '-')
+                if name.endswith('_bytes'):
+                    self.log('ERROR', f"{rel_path}: Over {name} budget: {value / 1024:.1f} KB > {limit / 1024:.1f} KB", 3, rule, rel_path)
+                else:
+                    self.log('ERROR', f"{rel_path}: Over {name} budget: {value} > {limit} ({', '.join(perf[name])})", 3, rule, rel_path)
+                self.stats['budget_failures'] += 1
+
+        if totals['pages']:
+            pages = totals['pages']
+            print(f"  Avg HTML: {totals['html_bytes'] / pages / 1024:.1f} KB ({totals['html_gzip_bytes'] / pages / 1024:.1f} KB gzip), "
+                  f"avg render-blocking: {totals['render_blocking'] / pages:.1f}, "
+                  f"avg images: {totals['image_bytes'] / pages / 1024:.1f} KB")
+            print(f"  Third-party origins: {', '.join(sorted(all_origins)) or 'none'}")
 
     def run(self):
         print(f"{Fore.CYAN}=== Starting SEO Audit ==={Style.RESET_ALL}")
@@ -293,10 +774,12 @@ class SEOAudit:
         self.scan_files()
         
         print(f"\n{Fore.CYAN}Analyzing Internal Structure...{Style.RESET_ALL}")
-        for full_path, rel_path in self.files_to_scan:
-            self.analyze_page(full_path, rel_path)
+        self.analyze_pages()
+        self.analyze_redirects()
             
         self.analyze_equity()
+        self.analyze_duplicates()
+        self.analyze_performance()
         
         if self.external_links:
             self.check_external_links()
@@ -308,14 +791,164 @@ class SEOAudit:
         print(f"Internal Links: {self.stats['internal_links']}")
         print(f"External Links: {self.stats['external_links']}")
         print(f"Dead Links: {self.stats['dead_links']}")
+        print(f"Links via Redirects: {self.stats['redirect_links']}")
+        print(f"Deep Pages: {self.stats['deep_pages']}")
+        print(f"Duplicate Content Issues: {self.stats['duplicates']}")
+        print(f"Budget Failures: {self.stats['budget_failures']}")
+        if self.detected_money_pages or self.money_pages:
+            print(f"Starved Money Pages: {self.stats['starved_money_pages']}")
+        if self.external_links and self.link_cache_path:
+            cache_stats = self.link_cache_stats
+            print(f"Link Cache: {cache_stats['hits']} hits, {cache_stats['revalidated']} revalidated, {cache_stats['misses']} misses")
+        if self.page_cache_path:
+            cache_stats = self.page_cache_stats
+            print(f"Page Cache: {cache_stats['reused']} reused ({cache_stats['relinked']} relinked), {cache_stats['analyzed']} analyzed")
         
+        self.print_score()
+        self.report.close(self.score, self.stats)
+
+    def print_score(self):
         score_color = Fore.GREEN if self.score >= 90 else (Fore.YELLOW if self.score >= 70 else Fore.RED)
         print(f"\nFinal Score: {score_color}{self.score}/100{Style.RESET_ALL}")
         
         if self.score < 100:
             print(f"\n{Fore.MAGENTA}Actionable Advice:{Style.RESET_ALL}")
+            worst_pages = self.report.summary()['worst_pages'][:5]
+            if worst_pages:
+                print("Pages losing the most points: " + ', '.join(f"{page} (-{lost})" for page, lost in worst_pages))
             print("Run 'python fix_links.py' (if available) or check the errors above.")
 
+    def crawl_page_name(self, url):
+        # Name crawled pages after the file that would serve them, so checks behave as they do on disk
+        path = unquote(urlparse(url).path).lstrip('/')
+        if not path or path.endswith('/'):
+            path += 'index.html'
+        return path
+
+    def run_crawl(self, start_url):
+        """Audit a running site over HTTP: status codes, redirects, TTFB, transfer
+        size and sitemap coverage, plus the page checks on every HTML response."""
+        print(f"{Fore.CYAN}=== Starting SEO Crawl: {start_url} ==={Style.RESET_ALL}")
+        crawler = SiteCrawler(start_url, **self.crawl_options)
+        # The crawler follows links itself, so the file-based link check is left out
+        check_classes = [c for c in self.page_checks if not issubclass(c, LinkCheck)]
+        page_results = {}
+
+        def check_page(url, elements):
+            result = self.new_page_result(self.crawl_page_name(url))
+            result['scanned'] = True
+            run_checks(self, None, result, elements, check_classes)
+            page_results[url] = result
+
+        pages = crawler.crawl(on_page=check_page)
+        self.log('INFO', f"Crawled {len(pages)} URLs, {len(crawler.blocked)} blocked by robots.txt.")
+        if crawler.truncated:
+            self.log('WARN', f"Crawl stopped after {crawler.max_pages} URLs; raise --max-pages to cover the whole site.", 0, 'crawl-truncated')
+
+        print(f"\n{Fore.CYAN}Page Checks...{Style.RESET_ALL}")
+        for url in sorted(page_results):
+            for level, message, score_deduction, rule in page_results[url]['logs']:
+                self.log(level, message, score_deduction, rule, url)
+
+        print(f"\n{Fore.CYAN}HTTP Responses...{Style.RESET_ALL}")
+        errors = 0
+        for url in sorted(pages):
+            record = pages[url]
+            status = record['status']
+            sources = sorted(crawler.referrers.get(url, ()))
+            linked_from = f" (linked from {', '.join(sources[:3])}{', ...' if len(sources) > 3 else ''})" if sources else ''
+            if not isinstance(status, int) or status >= 400:
+                error = f" ({record['error']})" if record.get('error') else ''
+                self.log('ERROR', f"{url} returned {status}{error}{linked_from}", 10, 'http-error', url)
+                errors += 1
+            elif 300 <= status < 400:
+                # /go/ style redirects are intentional; anything else costs a round trip per click
+                if sources and not any(urlparse(url).path.startswith(p) for p in self.redirect_url_prefixes):
+                    self.log('WARN', f"Internal link to redirect ({status}) {url} -> {record['location']}{linked_from}", 2, 'internal-redirect', url)
+            elif record['ttfb'] > self.slow_ttfb:
+                self.log('WARN', f"Slow response (TTFB {record['ttfb'] * 1000:.0f} ms): {url}", 2, 'slow-response', url)
+
+        print(f"\n{Fore.CYAN}Sitemap Cross-check...{Style.RESET_ALL}")
+        sitemap_urls = set(crawler.sitemap_urls)
+        if not sitemap_urls:
+            self.log('WARN', "No sitemap found (robots.txt Sitemap: or /sitemap.xml).", 5, 'missing-sitemap')
+        for url in sorted(sitemap_urls):
+            record = pages.get(url)
+            if url in crawler.blocked:
+                self.log('WARN', f"Sitemap URL blocked by robots.txt: {url}", 2, 'sitemap-blocked', url)
+            elif record is None or not isinstance(record['status'], int):
+                continue
+            elif 300 <= record['status'] < 400:
+                self.log('WARN', f"Sitemap URL redirects ({record['status']}) -> {record['location']}", 2, 'sitemap-redirect', url)
+            elif url != crawler.start_url and not crawler.referrers.get(url):
+                self.log('WARN', f"In sitemap but not linked from any crawled page: {url}", 2, 'sitemap-orphan', url)
+        for url in sorted(pages):
+            record = pages[url]
+            if record['status'] != 200 or record['content_type'] != 'text/html' or record['noindex'] or url in sitemap_urls:
+                continue
+            canonical = crawler.normalize(record['canonical']) if record['canonical'] else url
+            if canonical == url:
+                self.log('WARN', f"Indexable page missing from sitemap: {url}", 2, 'missing-from-sitemap', url)
+
+        # Response time and weight summary
+        timed = sorted((record['ttfb'], url) for url, record in pages.items() if record['ttfb'] is not None)
+        total_bytes = sum(record['bytes'] for record in pages.values())
+        if timed:
+            median = timed[len(timed) // 2][0]
+            p95 = timed[min(len(timed) - 1, int(len(timed) * 0.95))][0]
+            print(f"\n{Fore.BLUE}Slowest 5 by TTFB (median {median * 1000:.0f} ms, p95 {p95 * 1000:.0f} ms):{Style.RESET_ALL}")
+            for ttfb, url in reversed(timed[-5:]):
+                print(f"  - {url}: {ttfb * 1000:.0f} ms, {pages[url]['bytes'] / 1024:.1f} KB")
+
+        self.score = max(0, self.score)
+        print(f"\n{Fore.CYAN}=== Crawl Complete ==={Style.RESET_ALL}")
+        print(f"URLs Fetched: {len(pages)}")
+        print(f"HTML Pages Checked: {len(page_results)}")
+        print(f"Transferred: {total_bytes / 1024:.1f} KB")
+        print(f"Error Responses: {errors}")
+        print(f"Sitemap URLs: {len(sitemap_urls)}")
+        self.print_score()
+        self.report.close(self.score, {'urls_fetched': len(pages), 'html_pages': len(page_results), 'bytes': total_bytes,
+                                       'error_responses': errors, 'sitemap_urls': len(sitemap_urls)})
+
 if __name__ == '__main__':
-    audit = SEOAudit('.')
-    audit.run()
+    parser = argparse.ArgumentParser(description="Static SEO audit for the site.")
+    parser.add_argument('root', nargs='?', default='.', help="Site root directory")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes for page analysis (default: CPU count, 1 = serial)")
+    parser.add_argument('--link-cache', default='', help="External link cache file (default: <root>/.audit_cache/links.sqlite)")
+    parser.add_argument('--no-link-cache', action='store_true', help="Check every external link from scratch")
+    parser.add_argument('--page-cache', default='', help="Page analysis cache file (default: <root>/.audit_cache/pages.sqlite)")
+    parser.add_argument('--full', action='store_true', help="Re-analyze every page instead of only changed ones")
+    parser.add_argument('--crawl', metavar='URL', help="Audit a running server over HTTP instead of files on disk (e.g. http://localhost:8000)")
+    parser.add_argument('--max-pages', type=int, default=None, help="Crawl mode: stop queueing URLs after this many")
+    parser.add_argument('--concurrency', type=int, default=None, help="Crawl mode: requests in flight")
+    parser.add_argument('--budget', action='append', default=[], metavar='NAME=VALUE',
+                        help="Override a performance budget, e.g. html_gzip_bytes=30000 (repeatable; 'none' disables)")
+    parser.add_argument('--parser', choices=['soup', 'stream'], default='soup',
+                        help="Page scanner: full BeautifulSoup tree, or the faster streaming HTMLParser")
+    parser.add_argument('--report-jsonl', metavar='FILE', help="Also write every issue to FILE as JSON Lines, ending with a summary record")
+    parser.add_argument('--report-sarif', metavar='FILE', help="Also write every issue to FILE as SARIF 2.1.0 (for code scanning UIs)")
+    args = parser.parse_args()
+
+    audit = SEOAudit(args.root, workers=args.workers,
+                     link_cache_path=None if args.no_link_cache else args.link_cache,
+                     page_cache_path=None if args.full else args.page_cache)
+    audit.parser = args.parser
+    if args.report_jsonl or args.report_sarif:
+        audit.open_report(args.report_jsonl, args.report_sarif)
+    for budget in args.budget:
+        name, _, value = budget.partition('=')
+        if name not in audit.performance_budgets:
+            parser.error(f"unknown budget {name!r} (choose from {', '.join(audit.performance_budgets)})")
+        audit.performance_budgets[name] = None if value == 'none' else int(value)
+    if args.crawl:
+        if args.max_pages:
+            audit.crawl_options['max_pages'] = args.max_pages
+        if args.concurrency:
+            audit.crawl_options['concurrency'] = args.concurrency
+        audit.run_crawl(args.crawl)
+    else:
+        audit.run()
+        # Budgets are hard limits: let CI fail the build
+        if audit.stats['budget_failures']:
+            sys.exit(1)
@@ -1,14 +1,96 @@
 import os
+import sys
 import re
 import json
 import random
 import copy
+import hashlib
+import concurrent.futures
+from datetime import datetime, timezone, timedelta
+from email.utils import format_datetime
+from xml.sax.saxutils import escape
+from urllib.parse import urlparse, urljoin
 from bs4 import BeautifulSoup, Comment
 
+# Optional: responsive image variants need Pillow (pip install pillow)
+try:
+    from PIL import Image, features
+except ImportError:
+    Image = None
+
 # Configuration
 PROJECT_ROOT = os.path.dirname(os.path.abspath(__file__))
 BLOG_DIR = os.path.join(PROJECT_ROOT, 'blog')
 INDEX_PATH = os.path.join(PROJECT_ROOT, 'index.html')
+SITE_TIMEZONE = timezone(timedelta(hours=8)) # Post dates are Beijing time
+
+# Last-Modified Tracking
+LASTMOD_LEDGER_PATH = os.path.join(PROJECT_ROOT, 'lastmod.json') # Commit this: it is the page edit history
+SCHEMA_MODIFIABLE_TYPES = ('Article', 'BlogPosting', 'NewsArticle', 'WebPage', 'CollectionPage', 'AboutPage', 'FAQPage')
+
+# Resource Hints
+PRERENDER_LIMIT = 2 # Only the first few likely navigations are prerendered on hover; the rest are prefetched
+PREFETCH_IMMEDIATE_LIMIT = 3 # Prefetched right away; further links only on hover/pointerdown
+HINT_MARKER = 'data-build-hint' # Set on generated hints so hand-written ones survive rebuilds
+
+# Responsive Images
+IMAGE_CACHE_DIR = os.path.join(PROJECT_ROOT, 'assets', 'img', '_opt') # Build output only, never put sources here
+IMAGE_MANIFEST_PATH = os.path.join(IMAGE_CACHE_DIR, 'manifest.json')
+IMAGE_EXTENSIONS = ('.png', '.jpg', '.jpeg', '.webp')
+IMAGE_WIDTHS = [480, 800, 1200, 1600]
+IMAGE_FORMATS = ['avif', 'webp'] # Preferred first, <source> order matters
+IMAGE_QUALITY = {'avif': 60, 'webp': 80}
+IMAGE_SIZES = "(min-width: 1024px) 800px, 100vw" # Article column is ~800px on desktop
+IMAGE_EAGER_COUNT = 1 # Leading images per page treated as above the fold
+IMAGE_VARIANT_RE = re.compile(r'^[0-9a-f]{16}-\d+\.(?:avif|webp)(?:\.tmp)?$') # <hash>-<width>.<fmt>, the only files pruned
+
+# Feeds
+FEED_ITEM_LIMIT = 20
+FEED_FULL_CONTENT = True # False: description only
+FEED_TITLE = "YThezu.top 博客"
+FEED_DESCRIPTION = "YouTube Premium 合租、省钱与使用指南"
+FEED_FILES = {
+    'rss': ('feed.xml', 'application/rss+xml'),
+    'atom': ('atom.xml', 'application/atom+xml'),
+    'json': ('feed.json', 'application/feed+json')
+}
+HEADERS_PATH = os.path.join(PROJECT_ROOT, '_headers')
+
+# Search Index
+SEARCH_DIR = os.path.join(PROJECT_ROOT, 'assets', 'search-index') # Not /search/: that would shadow search.html's /search URL
+LEGACY_SEARCH_DIR = os.path.join(PROJECT_ROOT, 'search')
+SEARCH_SHARDS = 16 # Terms are sharded by first code point, assets/search.js must agree
+SEARCH_INDEX_BUDGET = 512 * 1024 # Total bytes across index.json and all shards
+SEARCH_FIELD_WEIGHTS = {'title': 8, 'description': 4, 'body': 1}
+SEARCH_TOKEN_RE = re.compile(r'[\u3400-\u9fff\uf900-\ufaff]+|[a-z0-9]+')
+
+def encode_image_variant(src_path, dest_path, width, fmt):
+    """Resize one source image and encode it. Runs in a worker process."""
+    with Image.open(src_path) as img:
+        if img.mode not in ('RGB', 'RGBA'):
+            img = img.convert('RGBA' if 'transparency' in img.info or img.mode in ('LA', 'P') else 'RGB')
+        if img.width > width:
+            height = round(img.height * width / img.width)
+            img = img.resize((width, height), Image.LANCZOS)
+        tmp_path = dest_path + '.tmp'
+        img.save(tmp_path, format=fmt.upper(), quality=IMAGE_QUALITY[fmt])
+    os.replace(tmp_path, dest_path)
+    return dest_path
+
+def tokenize_search_text(text):
+    """CJK runs become unigrams + bigrams, everything else lowercase word tokens.
+
+    Mirrored by tokenize() in assets/search.js.
+    """
+    tokens = []
+    for run in SEARCH_TOKEN_RE.findall(text.lower()):
+        if run[0].isascii():
+            if len(run) > 1 or run.isdigit():
+                tokens.append(run)
+        else:
+            tokens.extend(run)
+            tokens.extend(run[i:i + 2] for i in range(len(run) - 1))
+    return tokens
 
 class BlogBuilder:
     def __init__(self):
@@ -18,6 +100,20 @@ class BlogBuilder:
         self.posts_metadata = []
         self.global_styles = [] # To store tailwind/font-awesome from index or blog
         self.site_url = "https://ythezu.top"
+        self.lastmod_ledger = {} # url -> {hash, lastmod}
+        self.page_lastmod = {} # url -> lastmod for pages written in this build
+
+        # Image pipeline state
+        self.image_manifest = None # source rel path -> {mtime, size, hash, width, height}
+        self.image_pool = None
+        self.image_jobs = {} # variant path -> future
+        self.image_variants_used = set()
+        self.image_formats = []
+
+        # Final documents of this build, for post-build hooks such as the SEO audit
+        self.documents = {} # full path -> (html text, soup)
+        self.url_table = {} # clean URL -> full path of the page that serves it
+        self.post_build_hooks = [] # callables taking the builder, run after everything is written
 
     def update_static_page(self, filename):
         filepath = os.path.join(PROJECT_ROOT, filename)
@@ -59,10 +155,16 @@ class BlogBuilder:
             if a.get('href'):
                 a['href'] = self.clean_link(a['href'])
 
+        # noindex pages (search.html) stay out of the sitemap, so they stay out of the lastmod ledger too
+        if not self.is_noindex(soup):
+            self.track_lastmod(soup, self.clean_link('/' + filename))
+        self.optimize_images(soup, filepath)
+        self.inject_resource_hints(soup)
         self.write_formatted_html(filepath, soup)
 
     def run(self):
         print("Starting build process...")
+        self.load_lastmod_ledger()
         self.extract_assets()
         self.scan_posts()
         # Sort posts by date (newest first)
@@ -71,14 +173,24 @@ class BlogBuilder:
         self.process_posts()
         self.update_homepage()
         self.update_blog_index()
+        self.update_feeds()
+        self.update_search_index()
         
         # Update static pages
         self.update_static_page('support.html')
         self.update_static_page('privacy.html')
+        self.update_static_page('search.html')
+
+        # Wait for image variants queued while writing pages
+        self.finish_images()
         
         self.update_sitemap()
+        self.save_lastmod_ledger()
         print("Build complete.")
 
+        for hook in self.post_build_hooks:
+            hook(self)
+
     def update_sitemap(self):
         print("Updating sitemap.xml...")
         sitemap_path = os.path.join(PROJECT_ROOT, 'sitemap.xml')
@@ -102,13 +214,14 @@ class BlogBuilder:
         # Add Static Pages
         for page in static_pages:
             url = page['url']
+            if url not in self.page_lastmod:
+                continue # Not built, or noindex: sitemap and lastmod ledger list the same pages
             if url == '/': full_url = self.site_url + '/'
             elif url.endswith('/'): full_url = self.site_url + url
             else: full_url = self.site_url + url
             
-            # Use latest post date for homepage and blog index, or today's date
-            # For simplicity, let's use the latest post date for dynamic pages
-            date = latest_date
+            # Real last content change from the ledger, latest post date as a fallback
+            date = self.page_lastmod.get(url, latest_date)
             
             xml_content.append('  <url>')
             xml_content.append(f'    <loc>{full_url}</loc>')
@@ -119,7 +232,7 @@ class BlogBuilder:
         # Add Blog Posts
         for p in self.posts_metadata:
             full_url = self.site_url + p['url']
-            date = p['date']
+            date = p.get('lastmod', p['date'])
             
             xml_content.append('  <url>')
             xml_content.append(f'    <loc>{full_url}</loc>')
@@ -132,6 +245,78 @@ class BlogBuilder:
         with open(sitemap_path, 'w', encoding='utf-8') as f:
             f.write('\n'.join(xml_content))
 
+    def load_lastmod_ledger(self):
+        if os.path.exists(LASTMOD_LEDGER_PATH):
+            try:
+                with open(LASTMOD_LEDGER_PATH, 'r', encoding='utf-8') as f:
+                    self.lastmod_ledger = json.load(f)
+            except Exception as e:
+                print(f"Error reading lastmod ledger, starting fresh: {e}")
+
+    def save_lastmod_ledger(self):
+        # Pages no longer built drop out of the ledger
+        ledger = {url: self.lastmod_ledger[url] for url in sorted(self.page_lastmod)}
+        with open(LASTMOD_LEDGER_PATH, 'w', encoding='utf-8') as f:
+            json.dump(ledger, f, ensure_ascii=False, indent=2)
+            f.write('\n')
+
+    def get_meaningful_text(self, soup):
+        # Visible body text only; nav, footer, scripts and injected hints are build noise
+        root = soup.body or soup
+        parts = []
+        for text in root.find_all(string=True):
+            if isinstance(text, Comment):
+                continue
+            if text.find_parent(['nav', 'footer', 'script', 'style', 'noscript', 'template']):
+                continue
+            parts.append(text)
+        return ' '.join(parts)
+
+    def is_noindex(self, soup):
+        robots = soup.find('meta', attrs={'name': 'robots'})
+        return bool(robots and 'noindex' in robots.get('content', '').lower())
+
+    def track_lastmod(self, soup, url, body_text=None, first_seen=None):
+        title = soup.title.get_text() if soup.title else ''
+        desc = soup.find('meta', attrs={'name': 'description'})
+        if body_text is None:
+            body_text = self.get_meaningful_text(soup)
+        text = ' '.join(' '.join([title, desc.get('content', '') if desc else '', body_text]).split())
+        digest = hashlib.sha256(text.encode('utf-8')).hexdigest()[:16]
+
+        entry = self.lastmod_ledger.get(url)
+        if entry and entry['hash'] == digest:
+            lastmod = entry['lastmod']
+        else:
+            # New pages start at their publish date, edits stamp today
+            today = datetime.now(SITE_TIMEZONE).strftime('%Y-%m-%d')
+            lastmod = first_seen[:10] if entry is None and first_seen else today
+            self.lastmod_ledger[url] = {'hash': digest, 'lastmod': lastmod}
+
+        self.page_lastmod[url] = lastmod
+        self.set_schema_date_modified(soup, lastmod)
+        return lastmod
+
+    def set_schema_date_modified(self, soup, lastmod):
+        for script in soup.find_all('script', type='application/ld+json'):
+            try:
+                data = json.loads(script.string or '')
+            except ValueError:
+                continue
+            if isinstance(data, dict) and '@graph' in data:
+                items = data['@graph']
+            else:
+                items = data if isinstance(data, list) else [data]
+
+            changed = False
+            for item in items:
+                if isinstance(item, dict) and item.get('@type') in SCHEMA_MODIFIABLE_TYPES and item.get('dateModified') != lastmod:
+                    item['dateModified'] = lastmod
+                    changed = True
+            # Untouched schemas keep their hand-written formatting
+            if changed:
+                script.string = json.dumps(data, ensure_ascii=False, indent=2)
+
     def clean_link(self, url):
         if not url:
             return url
@@ -425,6 +610,8 @@ class BlogBuilder:
         head.append(soup.new_tag('meta', attrs={'http-equiv': 'content-language', 'content': 'zh-CN'}))
         head.append(soup.new_tag('link', attrs={'rel': 'alternate', 'hreflang': 'zh', 'href': canonical_href}))
         head.append(soup.new_tag('link', attrs={'rel': 'alternate', 'hreflang': 'x-default', 'href': canonical_href}))
+        for feed_link in self.build_feed_links(soup):
+            head.append(feed_link)
         head.append(Comment(" Group C: Indexing & Geo "))
 
         # Group D: Branding & Resources
@@ -486,6 +673,7 @@ class BlogBuilder:
                 soup.body.append(copy.copy(self.footer_html))
         
         # 3. Inject Recommendations
+        selected_posts = []
         article = soup.find('article')
         if article:
             for div in article.find_all('div', recursive=False):
@@ -527,20 +715,585 @@ class BlogBuilder:
         for a in soup.find_all('a'):
             if a.get('href'):
                 a['href'] = self.clean_link(a['href'])
-                
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(soup.prettify())
+
+        # 5. Responsive Images
+        self.optimize_images(soup, filepath)
+
+        # 6. Feed & Search Content
+        if article:
+            post_meta['content_html'] = self.get_feed_content(article, post_meta)
+            post_meta['body_text'] = BeautifulSoup(post_meta['content_html'], 'html.parser').get_text(' ', strip=True)
+        post_meta['lastmod'] = self.track_lastmod(soup, post_meta['url'], post_meta.get('body_text'), post_meta['date'])
+
+        # 7. Resource Hints for the recommended posts
+        self.inject_resource_hints(soup, [p['url'] for p in selected_posts])
+        self.save_html(filepath, soup)
+
+    def get_third_party_origins(self, soup):
+        # Origins the page actually loads subresources from (navigation links don't count)
+        site_host = urlparse(self.site_url).netloc
+        origins = {}
+        for tag in soup.find_all(['script', 'link', 'img', 'iframe', 'source']):
+            if tag.name == 'link':
+                rel = tag.get('rel', [])
+                if isinstance(rel, list): rel = ' '.join(rel)
+                if not any(r in rel for r in ('stylesheet', 'preload', 'modulepreload')):
+                    continue
+                url = tag.get('href', '')
+            else:
+                url = tag.get('src', '')
+
+            parsed = urlparse(url)
+            if parsed.scheme not in ('http', 'https') or parsed.netloc == site_host:
+                continue
+            origin = f"{parsed.scheme}://{parsed.netloc}"
+            # A preconnect is only reused by requests in the same CORS mode, which the tag's crossorigin decides
+            origins.setdefault(origin, set()).add(tag.has_attr('crossorigin'))
+        return origins
+
+    def inject_resource_hints(self, soup, next_urls=None):
+        head = soup.head
+        if not head:
+            return
+
+        # Drop hints from a previous build so rebuilding stays idempotent (hand-written ones are kept)
+        for tag in head.find_all('script', type='speculationrules'):
+            tag.decompose()
+        for tag in head.find_all('script', id='prefetch-fallback'):
+            tag.decompose()
+        for link in head.find_all('link', attrs={HINT_MARKER: True}):
+            link.decompose()
+        existing = set()
+        for link in head.find_all('link', rel='preconnect'):
+            existing.add((link.get('href', '').rstrip('/'), link.has_attr('crossorigin')))
+
+        # 1. Preconnect to third-party origins, ahead of the first resource that needs them
+        first_resource = None
+        for tag in head.find_all(['script', 'link']):
+            rel = tag.get('rel', [])
+            if isinstance(rel, list): rel = ' '.join(rel)
+            if (tag.name == 'script' and tag.get('src')) or 'stylesheet' in rel:
+                first_resource = tag
+                break
+
+        for origin, modes in sorted(self.get_third_party_origins(soup).items()):
+            for cors in sorted(modes):
+                if (origin, cors) in existing:
+                    continue
+                attrs = {'rel': 'preconnect', 'href': origin, HINT_MARKER: ''}
+                if cors:
+                    attrs['crossorigin'] = ''
+                hint = soup.new_tag('link', attrs=attrs)
+                if first_resource:
+                    first_resource.insert_before(hint)
+                else:
+                    head.append(hint)
+
+        # 2. Speculation rules for the posts this page links to
+        next_urls = list(dict.fromkeys(u for u in (next_urls or []) if u))
+        if not next_urls:
+            return
+
+        rules = {
+            "prerender": [{"source": "list", "urls": next_urls[:PRERENDER_LIMIT], "eagerness": "moderate"}],
+            "prefetch": [{"source": "list", "urls": next_urls[:PREFETCH_IMMEDIATE_LIMIT], "eagerness": "immediate"}]
+        }
+        if len(next_urls) > PREFETCH_IMMEDIATE_LIMIT:
+            # Long lists (the blog index) would fetch every post up front
+            rules["prefetch"].append({"source": "list", "urls": next_urls[PREFETCH_IMMEDIATE_LIMIT:], "eagerness": "moderate"})
+        rules_tag = soup.new_tag('script', type='speculationrules')
+        rules_tag.string = json.dumps(rules, ensure_ascii=False)
+        head.append(rules_tag)
+
+        # Fallback: browsers without speculation rules get plain <link rel=prefetch>
+        fallback = soup.new_tag('script', id='prefetch-fallback')
+        fallback.string = (
+            "if (!(HTMLScriptElement.supports && HTMLScriptElement.supports('speculationrules'))) {"
+            f" {json.dumps(next_urls[:PREFETCH_IMMEDIATE_LIMIT], ensure_ascii=False)}.forEach(function (u) {{"
+            " var l = document.createElement('link'); l.rel = 'prefetch'; l.href = u; document.head.appendChild(l);"
+            " }); }"
+        )
+        head.append(fallback)
+
+    def load_image_manifest(self):
+        self.image_manifest = {}
+        if Image is None:
+            print("Pillow not installed, images get lazy-loading only (pip install pillow).")
+            return
+
+        if os.path.exists(IMAGE_MANIFEST_PATH):
+            try:
+                with open(IMAGE_MANIFEST_PATH, 'r', encoding='utf-8') as f:
+                    self.image_manifest = json.load(f)
+            except Exception as e:
+                print(f"Error reading image manifest, re-scanning images: {e}")
+
+        self.image_formats = [fmt for fmt in IMAGE_FORMATS if features.check(fmt)]
+
+    def resolve_image_path(self, src, page_path):
+        parsed = urlparse(src)
+        if parsed.scheme in ('http', 'https'):
+            if parsed.netloc != urlparse(self.site_url).netloc:
+                return None
+        elif parsed.scheme or parsed.netloc:
+            return None # data:, protocol-relative, etc.
+
+        path = parsed.path
+        if not path.lower().endswith(IMAGE_EXTENSIONS):
+            return None
+        if path.startswith('/'):
+            full_path = os.path.join(PROJECT_ROOT, path.lstrip('/'))
+        else:
+            full_path = os.path.join(os.path.dirname(page_path), path)
+        full_path = os.path.normpath(full_path)
+        return full_path if os.path.isfile(full_path) else None
+
+    def get_image_info(self, full_path):
+        # Cached by mtime/size so unchanged sources are never re-read
+        rel_path = os.path.relpath(full_path, PROJECT_ROOT)
+        stat = os.stat(full_path)
+        info = self.image_manifest.get(rel_path)
+        if info and info['mtime'] == stat.st_mtime and info['size'] == stat.st_size:
+            return info
+
+        with open(full_path, 'rb') as f:
+            digest = hashlib.sha256(f.read()).hexdigest()[:16]
+        with Image.open(full_path) as img:
+            width, height = img.size
+
+        info = {'mtime': stat.st_mtime, 'size': stat.st_size, 'hash': digest, 'width': width, 'height': height}
+        self.image_manifest[rel_path] = info
+        return info
+
+    def queue_image_variant(self, full_path, variant_name, width, fmt):
+        dest_path = os.path.join(IMAGE_CACHE_DIR, variant_name)
+        self.image_variants_used.add(variant_name)
+        # Content-addressed: an existing file is already up to date
+        if os.path.exists(dest_path) or dest_path in self.image_jobs:
+            return
+
+        if self.image_pool is None:
+            os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+            self.image_pool = concurrent.futures.ProcessPoolExecutor()
+        self.image_jobs[dest_path] = self.image_pool.submit(encode_image_variant, full_path, dest_path, width, fmt)
+
+    def optimize_images(self, soup, page_path):
+        if self.image_manifest is None:
+            self.load_image_manifest()
+
+        cache_url = '/' + os.path.relpath(IMAGE_CACHE_DIR, PROJECT_ROOT).replace(os.sep, '/')
+        body = soup.body or soup
+        for index, img in enumerate(body.find_all('img', src=True)):
+            # Loading hints apply even without Pillow
+            if not img.get('loading'):
+                img['loading'] = 'eager' if index < IMAGE_EAGER_COUNT else 'lazy'
+            if not img.get('decoding'):
+                img['decoding'] = 'async'
+            if index < IMAGE_EAGER_COUNT and img['loading'] == 'eager' and not img.get('fetchpriority'):
+                img['fetchpriority'] = 'high'
+
+            if Image is None:
+                continue
+            full_path = self.resolve_image_path(img['src'], page_path)
+            info = None
+            if full_path:
+                try:
+                    info = self.get_image_info(full_path)
+                except Exception as e:
+                    print(f"  Skipping image {img['src']}: {e}")
+            if not info:
+                # Variants of a missing source get pruned, so don't keep pointing at them
+                self.remove_image_sources(img, cache_url)
+                continue
+
+            # Intrinsic dimensions reserve layout space (keep author-set sizes if present)
+            width, height = info['width'], info['height']
+            if img.get('width') and not img.get('height') and img['width'].isdigit():
+                img['height'] = str(round(int(img['width']) * height / width))
+            elif img.get('height') and not img.get('width') and img['height'].isdigit():
+                img['width'] = str(round(int(img['height']) * width / height))
+            elif not img.get('width') and not img.get('height'):
+                img['width'] = str(width)
+                img['height'] = str(height)
+
+            # Wrap in <picture>, replacing sources from a previous build
+            picture = img.parent
+            if picture.name == 'picture':
+                for source in picture.find_all('source', recursive=False):
+                    source.decompose()
+            else:
+                picture = img.wrap(soup.new_tag('picture'))
+
+            widths = sorted(set(min(w, width) for w in IMAGE_WIDTHS))
+            for fmt in self.image_formats:
+                srcset = []
+                for w in widths:
+                    variant_name = f"{info['hash']}-{w}.{fmt}"
+                    self.queue_image_variant(full_path, variant_name, w, fmt)
+                    srcset.append(f"{cache_url}/{variant_name} {w}w")
+                source = soup.new_tag('source', attrs={'type': f"image/{fmt}", 'srcset': ', '.join(srcset), 'sizes': IMAGE_SIZES})
+                img.insert_before(source)
+
+    def remove_image_sources(self, img, cache_url):
+        picture = img.parent
+        if picture is None or picture.name != 'picture':
+            return
+        for source in picture.find_all('source', recursive=False):
+            if source.get('srcset', '').startswith(cache_url + '/'):
+                source.decompose()
+        if not picture.find('source', recursive=False):
+            picture.unwrap()
+
+    def drop_failed_variants(self, failed):
+        # Pages were written while encoding ran; take failed variants back out of their srcsets
+        cache_url = '/' + os.path.relpath(IMAGE_CACHE_DIR, PROJECT_ROOT).replace(os.sep, '/')
+        for filepath, (html, soup) in list(self.documents.items()):
+            changed = False
+            for source in soup.find_all('source', srcset=True):
+                candidates = [c.strip() for c in source['srcset'].split(',')]
+                kept = [c for c in candidates if not (c.startswith(cache_url + '/') and c.split()[0].rsplit('/', 1)[1] in failed)]
+                if len(kept) == len(candidates):
+                    continue
+                changed = True
+                if kept:
+                    source['srcset'] = ', '.join(kept)
+                else:
+                    source.decompose()
+            if changed:
+                for picture in soup.find_all('picture'):
+                    if not picture.find('source', recursive=False):
+                        picture.unwrap()
+                self.save_html(filepath, soup)
+
+    def finish_images(self):
+        if self.image_manifest is None or Image is None:
+            return
+
+        if self.image_jobs:
+            print(f"Encoding {len(self.image_jobs)} image variants...")
+            failed = set()
+            for dest_path, future in self.image_jobs.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"  Failed to encode {os.path.basename(dest_path)}: {e}")
+                    failed.add(os.path.basename(dest_path))
+            self.image_pool.shutdown()
+            if failed:
+                self.image_variants_used -= failed
+                self.drop_failed_variants(failed)
+
+        # Prune variants and manifest entries no page references anymore
+        if os.path.isdir(IMAGE_CACHE_DIR):
+            for name in os.listdir(IMAGE_CACHE_DIR):
+                if IMAGE_VARIANT_RE.match(name) and name not in self.image_variants_used:
+                    os.remove(os.path.join(IMAGE_CACHE_DIR, name))
+        used_hashes = set(name.split('-')[0] for name in self.image_variants_used)
+        self.image_manifest = {k: v for k, v in self.image_manifest.items() if v['hash'] in used_hashes}
+
+        if self.image_manifest:
+            os.makedirs(IMAGE_CACHE_DIR, exist_ok=True)
+            with open(IMAGE_MANIFEST_PATH, 'w', encoding='utf-8') as f:
+                json.dump(self.image_manifest, f, indent=2, sort_keys=True)
+        elif os.path.exists(IMAGE_MANIFEST_PATH):
+            os.remove(IMAGE_MANIFEST_PATH)
+
+    def build_feed_links(self, soup):
+        return [
+            soup.new_tag('link', attrs={'rel': 'alternate', 'type': mime, 'title': FEED_TITLE, 'href': f"{self.site_url}/{filename}"})
+            for filename, mime in FEED_FILES.values()
+        ]
+
+    def inject_feed_links(self, soup):
+        if not soup.head:
+            return
+        feed_types = set(mime for _, mime in FEED_FILES.values())
+        for link in soup.head.find_all('link', type=lambda t: t in feed_types):
+            link.decompose()
+
+        # Keep feed discovery next to the other alternates
+        alternates = soup.head.find_all('link', rel='alternate')
+        anchor = alternates[-1] if alternates else None
+        for feed_link in self.build_feed_links(soup):
+            if anchor:
+                anchor.insert_after(feed_link)
+                anchor = feed_link
+            else:
+                soup.head.append(feed_link)
+
+    def get_feed_content(self, article, post_meta):
+        # Article body without the recommendations block, with absolute URLs for feed readers
+        page_url = self.site_url + post_meta['url']
+        content = copy.copy(article)
+        for div in content.find_all('div', recursive=False):
+            if "推荐阅读" in div.get_text():
+                div.decompose()
+        for attr in ('href', 'src'):
+            for tag in content.find_all(attrs={attr: True}):
+                tag[attr] = urljoin(page_url, tag[attr])
+        for tag in content.find_all(srcset=True):
+            candidates = [c.strip().split(' ', 1) for c in tag['srcset'].split(',') if c.strip()]
+            tag['srcset'] = ', '.join(' '.join([urljoin(page_url, c[0])] + c[1:]) for c in candidates)
+        return content.decode_contents().strip()
+
+    def feed_datetime(self, date_str):
+        try:
+            return datetime.strptime(date_str[:10], '%Y-%m-%d').replace(tzinfo=SITE_TIMEZONE)
+        except ValueError:
+            return datetime(2026, 1, 1, tzinfo=SITE_TIMEZONE)
+
+    def update_feeds(self):
+        items = self.posts_metadata[:FEED_ITEM_LIMIT]
+
+        # Fingerprint of everything that ends up in the feeds; unchanged top-N means nothing to do
+        fingerprint_data = {
+            'site_url': self.site_url,
+            'full_content': FEED_FULL_CONTENT,
+            'items': [
+                [p['url'], p['title'], p['description'], p['date'], p.get('lastmod', ''), p['image'],
+                 p.get('content_html', '') if FEED_FULL_CONTENT else '']
+                for p in items
+            ]
+        }
+        fingerprint = hashlib.sha256(json.dumps(fingerprint_data, ensure_ascii=False, sort_keys=True).encode('utf-8')).hexdigest()
+
+        header_lines = []
+        for kind, (filename, mime) in FEED_FILES.items():
+            etag = hashlib.sha256(f"{fingerprint}:{kind}".encode('utf-8')).hexdigest()[:20]
+            header_lines.append(f"/{filename}")
+            header_lines.append(f"  Content-Type: {mime}; charset=utf-8")
+            header_lines.append(f'  ETag: "{etag}"')
+            header_lines.append("  Cache-Control: public, max-age=0, must-revalidate")
+
+        feed_paths = {kind: os.path.join(PROJECT_ROOT, filename) for kind, (filename, _) in FEED_FILES.items()}
+        if self.read_headers_section('feeds') == header_lines and all(os.path.exists(p) for p in feed_paths.values()):
+            print("Feeds unchanged, skipping.")
+            return
+
+        print(f"Updating feeds ({len(items)} items)...")
+        self.write_feed(feed_paths['rss'], self.generate_rss(items))
+        self.write_feed(feed_paths['atom'], self.generate_atom(items))
+        self.write_feed(feed_paths['json'], self.generate_json_feed(items))
+        self.update_headers_section('feeds', header_lines)
+
+    def write_feed(self, path, chunks):
+        # Stream to a temp file so pollers never see a half-written feed
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for chunk in chunks:
+                f.write(chunk)
+        os.replace(tmp_path, path)
+
+    def generate_rss(self, items):
+        blog_url = f"{self.site_url}/blog/"
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<rss version="2.0" xmlns:atom="http://www.w3.org/2005/Atom" xmlns:content="http://purl.org/rss/1.0/modules/content/">\n'
+        yield '<channel>\n'
+        yield f'  <title>{escape(FEED_TITLE)}</title>\n'
+        yield f'  <link>{blog_url}</link>\n'
+        yield f'  <description>{escape(FEED_DESCRIPTION)}</description>\n'
+        yield '  <language>zh-CN</language>\n'
+        if items:
+            # Newest post date rather than build time, so identical input gives identical output
+            yield f'  <lastBuildDate>{format_datetime(self.feed_datetime(items[0]["date"]))}</lastBuildDate>\n'
+        yield f'  <atom:link href="{self.site_url}/{FEED_FILES["rss"][0]}" rel="self" type="{FEED_FILES["rss"][1]}"/>\n'
+        for p in items:
+            url = self.site_url + p['url']
+            yield '  <item>\n'
+            yield f'    <title>{escape(p["title"])}</title>\n'
+            yield f'    <link>{url}</link>\n'
+            yield f'    <guid isPermaLink="true">{url}</guid>\n'
+            yield f'    <pubDate>{format_datetime(self.feed_datetime(p["date"]))}</pubDate>\n'
+            yield f'    <description>{escape(p["description"])}</description>\n'
+            if FEED_FULL_CONTENT and p.get('content_html'):
+                yield f'    <content:encoded>{escape(p["content_html"])}</content:encoded>\n'
+            yield '  </item>\n'
+        yield '</channel>\n'
+        yield '</rss>\n'
+
+    def generate_atom(self, items):
+        updated = self.feed_datetime(items[0]['date'] if items else '').isoformat()
+        yield '<?xml version="1.0" encoding="UTF-8"?>\n'
+        yield '<feed xmlns="http://www.w3.org/2005/Atom" xml:lang="zh-CN">\n'
+        yield f'  <title>{escape(FEED_TITLE)}</title>\n'
+        yield f'  <subtitle>{escape(FEED_DESCRIPTION)}</subtitle>\n'
+        yield f'  <link href="{self.site_url}/{FEED_FILES["atom"][0]}" rel="self" type="{FEED_FILES["atom"][1]}"/>\n'
+        yield f'  <link href="{self.site_url}/blog/"/>\n'
+        yield f'  <id>{self.site_url}/blog/</id>\n'
+        yield f'  <updated>{updated}</updated>\n'
+        yield f'  <author><name>{escape(urlparse(self.site_url).netloc)}</name></author>\n'
+        for p in items:
+            url = self.site_url + p['url']
+            date = self.feed_datetime(p['date']).isoformat()
+            updated = self.feed_datetime(p.get('lastmod', p['date'])).isoformat()
+            yield '  <entry>\n'
+            yield f'    <title>{escape(p["title"])}</title>\n'
+            yield f'    <link href="{url}"/>\n'
+            yield f'    <id>{url}</id>\n'
+            yield f'    <published>{date}</published>\n'
+            yield f'    <updated>{updated}</updated>\n'
+            yield f'    <summary>{escape(p["description"])}</summary>\n'
+            if FEED_FULL_CONTENT and p.get('content_html'):
+                yield f'    <content type="html">{escape(p["content_html"])}</content>\n'
+            yield '  </entry>\n'
+        yield '</feed>\n'
+
+    def generate_json_feed(self, items):
+        header = {
+            "version": "https://jsonfeed.org/version/1.1",
+            "title": FEED_TITLE,
+            "description": FEED_DESCRIPTION,
+            "home_page_url": f"{self.site_url}/blog/",
+            "feed_url": f"{self.site_url}/{FEED_FILES['json'][0]}",
+            "language": "zh-CN"
+        }
+        # Emit the envelope, then one item at a time
+        yield json.dumps(header, ensure_ascii=False, indent=2)[:-2] + ',\n  "items": [\n'
+        for index, p in enumerate(items):
+            url = self.site_url + p['url']
+            item = {
+                "id": url,
+                "url": url,
+                "title": p['title'],
+                "summary": p['description'],
+                "date_published": self.feed_datetime(p['date']).isoformat(),
+                "date_modified": self.feed_datetime(p.get('lastmod', p['date'])).isoformat()
+            }
+            if p['image']:
+                item["image"] = p['image']
+            if FEED_FULL_CONTENT and p.get('content_html'):
+                item["content_html"] = p['content_html']
+            else:
+                item["content_text"] = p['description']
+            separator = ',\n' if index < len(items) - 1 else '\n'
+            yield '    ' + json.dumps(item, ensure_ascii=False) + separator
+        yield '  ]\n}\n'
+
+    def update_search_index(self):
+        print("Updating search index...")
+
+        # 1. Term -> {doc_id: weighted term frequency}, plus the best field each term appears in
+        postings = {}
+        best_field = {}
+        docs = []
+        for doc_id, p in enumerate(self.posts_metadata):
+            docs.append([p['url'], p['title'], p['description'], p['date']])
+            fields = {'title': p['title'], 'description': p['description'], 'body': p.get('body_text', '')}
+            for field, text in fields.items():
+                weight = SEARCH_FIELD_WEIGHTS[field]
+                for token in tokenize_search_text(text):
+                    doc_scores = postings.setdefault(token, {})
+                    doc_scores[doc_id] = doc_scores.get(doc_id, 0) + weight
+                    best_field[token] = max(best_field.get(token, 0), weight)
+
+        index_data = {
+            "version": "",
+            "shards": SEARCH_SHARDS,
+            "weights": SEARCH_FIELD_WEIGHTS,
+            "docs": docs
+        }
+
+        # 2. Fit the byte budget: title/description terms first, then the rarest (most selective) body terms
+        budget = SEARCH_INDEX_BUDGET - len(json.dumps(index_data, ensure_ascii=False).encode('utf-8')) - 64
+        shards = [{} for _ in range(SEARCH_SHARDS)]
+        dropped = 0
+        for term in sorted(postings, key=lambda t: (-best_field[t], len(postings[t]), t)):
+            # Delta-encoded doc ids interleaved with scores: [id0, s0, id1 - id0, s1, ...]
+            encoded = []
+            previous = 0
+            for doc_id in sorted(postings[term]):
+                encoded.extend([doc_id - previous, postings[term][doc_id]])
+                previous = doc_id
+            size = len(json.dumps({term: encoded}, ensure_ascii=False, separators=(',', ':')).encode('utf-8'))
+            if size > budget:
+                dropped += 1
+                continue
+            budget -= size
+            shards[ord(term[0]) % SEARCH_SHARDS][term] = encoded
+
+        # 3. Write only files whose content changed
+        os.makedirs(SEARCH_DIR, exist_ok=True)
+        shard_texts = [json.dumps(dict(sorted(shard.items())), ensure_ascii=False, separators=(',', ':')) for shard in shards]
+        index_data["version"] = hashlib.sha256(''.join(shard_texts).encode('utf-8')).hexdigest()[:12]
+        outputs = {'index.json': json.dumps(index_data, ensure_ascii=False, separators=(',', ':'))}
+        for i, text in enumerate(shard_texts):
+            outputs[f"shard-{i}.json"] = text
+
+        changed = 0
+        for name, text in outputs.items():
+            path = os.path.join(SEARCH_DIR, name)
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    if f.read() == text:
+                        continue
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+            changed += 1
+
+        # Stale shards from a larger SEARCH_SHARDS setting
+        for name in os.listdir(SEARCH_DIR):
+            if name.startswith('shard-') and name not in outputs:
+                os.remove(os.path.join(SEARCH_DIR, name))
+        # Index written to /search/ by older builds: hosts redirect /search to it, away from search.html
+        if os.path.isdir(LEGACY_SEARCH_DIR):
+            for name in os.listdir(LEGACY_SEARCH_DIR):
+                if name == 'index.json' or (name.startswith('shard-') and name.endswith('.json')):
+                    os.remove(os.path.join(LEGACY_SEARCH_DIR, name))
+            if not os.listdir(LEGACY_SEARCH_DIR):
+                os.rmdir(LEGACY_SEARCH_DIR)
+
+        total = sum(len(text.encode('utf-8')) for text in outputs.values())
+        print(f"  {len(postings) - dropped} terms in {SEARCH_SHARDS} shards, {total} bytes, {changed} files written")
+        if dropped:
+            print(f"  Dropped {dropped} low-value terms to stay under {SEARCH_INDEX_BUDGET} bytes")
+
+    def read_headers_section(self, name):
+        # Lines between the "# BEGIN <name>" / "# END <name>" markers in _headers
+        if not os.path.exists(HEADERS_PATH):
+            return None
+        with open(HEADERS_PATH, 'r', encoding='utf-8') as f:
+            lines = f.read().splitlines()
+        begin, end = f"# BEGIN {name}", f"# END {name}"
+        if begin not in lines or end not in lines:
+            return None
+        return lines[lines.index(begin) + 1:lines.index(end)]
+
+    def update_headers_section(self, name, section_lines):
+        lines = []
+        if os.path.exists(HEADERS_PATH):
+            with open(HEADERS_PATH, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+
+        begin, end = f"# BEGIN {name}", f"# END {name}"
+        block = [begin] + section_lines + [end]
+        if begin in lines and end in lines:
+            lines[lines.index(begin):lines.index(end) + 1] = block
+        else:
+            if lines and lines[-1].strip():
+                lines.append('')
+            lines.extend(block)
+
+        with open(HEADERS_PATH, 'w', encoding='utf-8') as f:
+            f.write('\n'.join(lines) + '\n')
 
     def write_formatted_html(self, filepath, soup):
         print(f"  Writing formatted HTML to {filepath}...")
+        self.save_html(filepath, soup)
+
+    def save_html(self, filepath, soup):
+        html = soup.prettify()
         with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(soup.prettify())
+            f.write(html)
+        # Keep the final document so post-build hooks don't have to re-read and re-parse it
+        self.documents[filepath] = (html, soup)
+        self.url_table[self.clean_link('/' + os.path.relpath(filepath, PROJECT_ROOT).replace(os.sep, '/'))] = filepath
 
     def update_homepage(self):
         print("Updating homepage...")
         with open(INDEX_PATH, 'r', encoding='utf-8') as f:
             soup = BeautifulSoup(f, 'html.parser')
             
+        next_urls = []
         guides_section = soup.find('section', id='guides')
         if guides_section:
             grid = guides_section.find('div', class_='grid')
@@ -598,7 +1351,12 @@ class BlogBuilder:
                     a_tag.append(div_content)
                     
                     grid.append(a_tag)
+                    next_urls.append(p['url'])
 
+        self.track_lastmod(soup, '/')
+        self.optimize_images(soup, INDEX_PATH)
+        self.inject_feed_links(soup)
+        self.inject_resource_hints(soup, next_urls)
         self.write_formatted_html(INDEX_PATH, soup)
 
     def update_blog_index(self):
@@ -722,8 +1480,24 @@ class BlogBuilder:
                 if soup.head:
                     soup.head.append(script_tag)
 
+            self.track_lastmod(soup, '/blog/')
+            self.optimize_images(soup, blog_index_path)
+            self.inject_feed_links(soup)
+            self.inject_resource_hints(soup, [p['url'] for p in self.posts_metadata] if grid else [])
             self.write_formatted_html(blog_index_path, soup)
 
+def run_audit_hook(builder):
+    # Imported here so a plain build doesn't need the audit's dependencies
+    from audit import SEOAudit
+    audit = SEOAudit(PROJECT_ROOT)
+    audit.attach_build(builder)
+    audit.run()
+    if audit.stats['budget_failures']:
+        sys.exit(1)
+
 if __name__ == "__main__":
     builder = BlogBuilder()
+    if '--audit' in sys.argv[1:]:
+        # Audit the in-memory result of this build instead of re-reading it from disk
+        builder.post_build_hooks.append(run_audit_hook)
     builder.run()
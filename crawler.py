@@ -0,0 +1,257 @@
+# Dependencies:
+# pip install aiohttp
+
+import asyncio
+import gzip
+import time
+import zlib
+import xml.etree.ElementTree as ET
+from collections import defaultdict
+from urllib.parse import urljoin, urlparse, urldefrag
+from urllib.robotparser import RobotFileParser
+
+import aiohttp
+
+from page_checks import ElementScanner
+from sitemaps import CHUNK_SIZE, SitemapParser
+
+
+class SiteCrawler:
+    """Breadth-first crawler for one site over HTTP.
+
+    Starts from start_url, follows same-site links and redirects with at most
+    `concurrency` requests in flight, and stops queueing new URLs after
+    max_pages. robots.txt is honoured. Redirects are recorded, not followed
+    blindly, so the report shows what the server answers for each URL.
+    """
+
+    def __init__(self, start_url, user_agent='SEOAuditBot/1.0', concurrency=8, max_pages=5000, timeout=10):
+        parsed = urlparse(start_url)
+        self.origin = f"{parsed.scheme}://{parsed.netloc}"
+        self.start_url = self.origin + (parsed.path or '/')
+        self.user_agent = user_agent
+        self.concurrency = concurrency
+        self.max_pages = max_pages
+        self.timeout = timeout
+        self.aliases = set() # Other origins that mean this site, e.g. the production domain in the sitemap
+        self.robots = None
+        self.sitemap_urls = [] # Sitemap entries, mapped onto the crawl origin
+        self.pages = {} # url -> fetch record
+        self.referrers = defaultdict(set) # url -> pages linking to it
+        self.seen = set()
+        self.blocked = set() # Disallowed by robots.txt
+        self.truncated = False
+        self.on_page = None
+
+    def normalize(self, url):
+        """Same-site absolute URL on the crawl origin without fragment, or None for other sites."""
+        url = urldefrag(url)[0]
+        parsed = urlparse(url)
+        if parsed.scheme not in ('http', 'https'):
+            return None
+        origin = f"{parsed.scheme}://{parsed.netloc}"
+        if origin != self.origin and origin not in self.aliases:
+            return None
+        return self.origin + (parsed.path or '/') + (f"?{parsed.query}" if parsed.query else '')
+
+    def resolve(self, base, href):
+        """normalize() for a link relative to base; None as well for hrefs that don't parse (http://[oops/)."""
+        try:
+            return self.normalize(urljoin(base, href))
+        except ValueError:
+            return None
+
+    def crawl(self, on_page=None):
+        """Crawl the site and return {url: record}. Blocking wrapper around crawl_async.
+
+        on_page(url, elements) is called for every HTML page with its
+        (name, attrs) element list, so page checks run as pages arrive.
+        """
+        self.on_page = on_page
+        return asyncio.run(self.crawl_async())
+
+    async def crawl_async(self):
+        connector = aiohttp.TCPConnector(limit=self.concurrency)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        # Compressed bodies are read as-is so transfer size is what went over the wire
+        headers = {'User-Agent': self.user_agent, 'Accept-Encoding': 'gzip, deflate'}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers, auto_decompress=False) as session:
+            await self.load_robots(session)
+            await self.load_sitemaps(session)
+
+            queue = asyncio.Queue()
+            self.enqueue(queue, self.start_url, None)
+            # Sitemap URLs are fetched too, so entries nothing links to still get a status
+            for url in self.sitemap_urls:
+                self.enqueue(queue, url, None)
+
+            workers = [asyncio.create_task(self.worker(session, queue)) for _ in range(self.concurrency)]
+            await queue.join()
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        return self.pages
+
+    def enqueue(self, queue, url, referrer):
+        if referrer:
+            self.referrers[url].add(referrer)
+        if url in self.seen:
+            return
+        self.seen.add(url)
+        if self.robots and not self.robots.can_fetch(self.user_agent, url):
+            self.blocked.add(url)
+            return
+        if len(self.seen) - len(self.blocked) > self.max_pages:
+            self.truncated = True
+            return
+        queue.put_nowait(url)
+
+    async def worker(self, session, queue):
+        while True:
+            url = await queue.get()
+            try:
+                self.pages[url] = await self.fetch_page(session, queue, url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # A bad body or a failing page check must not take the worker down: queue.join() would never return
+                self.pages[url] = self.error_record('Crawl Error', e)
+            finally:
+                queue.task_done()
+
+    def error_record(self, status, error):
+        return {'status': status, 'error': str(error) or error.__class__.__name__,
+                'ttfb': None, 'time': None, 'bytes': 0, 'content_type': None, 'location': None}
+
+    async def get(self, session, url):
+        """GET without following redirects. Returns (response info, body) or raises aiohttp errors."""
+        started = time.perf_counter()
+        async with session.get(url, allow_redirects=False) as response:
+            ttfb = time.perf_counter() - started
+            body = await response.read()
+            info = {
+                'status': response.status,
+                'ttfb': ttfb,
+                'time': time.perf_counter() - started,
+                'bytes': len(body),
+                'content_type': response.content_type,
+                'charset': response.charset,
+                'encoding': response.headers.get('Content-Encoding', '').lower(),
+                'location': response.headers.get('Location')
+            }
+        return info, body
+
+    def decode_body(self, info, body):
+        if info['encoding'] == 'gzip':
+            body = gzip.decompress(body)
+        elif info['encoding'] == 'deflate':
+            try:
+                body = zlib.decompress(body)
+            except zlib.error:
+                body = zlib.decompress(body, -zlib.MAX_WBITS) # Raw deflate stream
+        return body.decode(info['charset'] or 'utf-8', errors='replace')
+
+    async def fetch_page(self, session, queue, url):
+        try:
+            info, body = await self.get(session, url)
+        except (aiohttp.ClientError, asyncio.TimeoutError, ValueError) as e:
+            return self.error_record('Connection Error', e)
+
+        record = {key: info[key] for key in ('status', 'ttfb', 'time', 'bytes', 'content_type')}
+        record.update({'location': None, 'canonical': None, 'noindex': False, 'error': None})
+
+        if 300 <= info['status'] < 400 and info['location']:
+            try:
+                record['location'] = urljoin(url, info['location'])
+            except ValueError:
+                record['location'] = info['location']
+            target = self.resolve(url, info['location'])
+            if target:
+                self.enqueue(queue, target, url)
+
+        if info['status'] == 200 and info['content_type'] == 'text/html':
+            elements = self.scan(self.decode_body(info, body))
+            for name, attrs in elements:
+                if name == 'a' and attrs.get('href'):
+                    target = self.resolve(url, attrs['href'].strip())
+                    if target:
+                        self.enqueue(queue, target, url)
+                elif name == 'link' and 'canonical' in attrs.get('rel', ()) and attrs.get('href'):
+                    try:
+                        record['canonical'] = urljoin(url, attrs['href'])
+                    except ValueError:
+                        pass # Unparseable canonical: treated as missing
+                elif name == 'meta' and attrs.get('name', '').lower() == 'robots' and 'noindex' in attrs.get('content', '').lower():
+                    record['noindex'] = True
+            if self.on_page:
+                self.on_page(url, elements)
+        return record
+
+    def scan(self, text):
+        scanner = ElementScanner()
+        scanner.feed(text)
+        scanner.close()
+        return scanner.elements
+
+    async def fetch_text(self, session, url):
+        """Body of a 200 response as text, or (status, None) for anything else."""
+        try:
+            info, body = await self.get(session, url)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            return 'Connection Error', None
+        if info['status'] != 200:
+            return info['status'], None
+        if url.endswith('.gz') and body[:2] == b'\x1f\x8b':
+            body = gzip.decompress(body)
+            info['encoding'] = ''
+        return 200, self.decode_body(info, body)
+
+    async def load_robots(self, session):
+        robots_url = self.origin + '/robots.txt'
+        self.robots = RobotFileParser(robots_url)
+        status, text = await self.fetch_text(session, robots_url)
+        if text is not None:
+            self.robots.parse(text.splitlines())
+        elif status in (401, 403):
+            self.robots.disallow_all = True
+        else:
+            self.robots.allow_all = True # Missing robots.txt (or the server failed): everything is allowed
+
+    async def load_sitemaps(self, session):
+        # Sitemaps listed in robots.txt usually name the production domain; map them onto this server
+        declared = (self.robots.site_maps() if self.robots else None) or [self.origin + '/sitemap.xml']
+        pending = [self.origin + urlparse(url).path for url in declared]
+        loaded = set()
+        while pending:
+            sitemap_url = pending.pop(0)
+            if sitemap_url in loaded:
+                continue
+            loaded.add(sitemap_url)
+            try:
+                await self.read_sitemap(session, sitemap_url, pending)
+            except (aiohttp.ClientError, asyncio.TimeoutError, ET.ParseError, zlib.error):
+                continue # Unreachable or malformed: the cross-check reports what was read
+
+    async def read_sitemap(self, session, sitemap_url, pending):
+        """Parse one sitemap as its body streams in; index entries are appended to pending."""
+        parser = SitemapParser()
+        async with session.get(sitemap_url, allow_redirects=False) as response:
+            if response.status != 200:
+                return
+            # Undo Content-Encoding here; a .xml.gz body underneath is gunzipped by the parser
+            encoding = response.headers.get('Content-Encoding', '').lower()
+            decoder = zlib.decompressobj(32 + zlib.MAX_WBITS) if encoding in ('gzip', 'deflate') else None
+            async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                self.add_sitemap_entries(parser.feed(decoder.decompress(chunk) if decoder else chunk), pending)
+            if decoder:
+                self.add_sitemap_entries(parser.feed(decoder.flush()), pending)
+        self.add_sitemap_entries(parser.close(), pending)
+
+    def add_sitemap_entries(self, entries, pending):
+        for kind, loc, lastmod in entries:
+            parsed = urlparse(loc)
+            if kind == 'sitemap':
+                pending.append(self.origin + parsed.path)
+                continue
+            self.aliases.add(f"{parsed.scheme}://{parsed.netloc}")
+            self.sitemap_urls.append(self.origin + (parsed.path or '/') + (f"?{parsed.query}" if parsed.query else ''))
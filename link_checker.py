@@ -0,0 +1,203 @@
+# Dependencies:
+# pip install aiohttp
+
+import asyncio
+import os
+import sqlite3
+import time
+from urllib.parse import urlparse
+
+import aiohttp
+
+# Statuses worth retrying: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+# Statuses some servers return for HEAD even though GET works
+HEAD_REJECTED_STATUSES = {400, 403, 404, 405, 406, 501}
+
+# How long a cached result is trusted, per outcome class (seconds)
+DEFAULT_CACHE_TTLS = {
+    'ok': 7 * 86400,
+    'redirect': 3 * 86400,
+    'client_error': 86400,
+    'server_error': 3600,
+    'connection_error': 3600
+}
+
+
+class LinkChecker:
+    """Checks external URLs with asyncio, one keep-alive pool shared across hosts.
+
+    Each URL is checked once. Requests to the same host are capped by
+    per_host concurrent connections and spaced at least per_host_interval
+    seconds apart. HEAD is tried first and falls back to GET when the server
+    rejects it.
+    """
+
+    def __init__(self, user_agent='SEOAuditBot/1.0', timeout=5, concurrency=20, per_host=4,
+                 per_host_interval=0.25, retries=2, backoff=0.5):
+        self.user_agent = user_agent
+        self.timeout = timeout
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.per_host_interval = per_host_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.host_semaphores = {}
+        self.host_next_slot = {}
+
+    def check(self, urls, conditional_headers=None):
+        """Check URLs and return {url: result}. Blocking wrapper around check_async.
+
+        conditional_headers maps a URL to extra request headers, e.g.
+        If-None-Match / If-Modified-Since for revalidating a cached result.
+        """
+        return asyncio.run(self.check_async(urls, conditional_headers))
+
+    async def check_async(self, urls, conditional_headers=None):
+        urls = list(dict.fromkeys(urls)) # Dedupe, keep order
+        conditional_headers = conditional_headers or {}
+        self.host_semaphores = {}
+        self.host_next_slot = {}
+
+        connector = aiohttp.TCPConnector(limit=self.concurrency, limit_per_host=self.per_host, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        headers = {'User-Agent': self.user_agent}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            results = await asyncio.gather(*(self.check_url(session, url, conditional_headers.get(url)) for url in urls))
+        return dict(zip(urls, results))
+
+    async def wait_for_host(self, host):
+        # Reserve the next request slot for this host (simple per-host rate limit)
+        now = time.monotonic()
+        slot = max(now, self.host_next_slot.get(host, now))
+        self.host_next_slot[host] = slot + self.per_host_interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+    async def request(self, session, method, url, extra_headers=None):
+        host = urlparse(url).netloc
+        semaphore = self.host_semaphores.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with semaphore:
+            await self.wait_for_host(host)
+            async with session.request(method, url, allow_redirects=True, headers=extra_headers) as response:
+                # Headers are all we need; the connection goes back to the pool without reading the body
+                return {
+                    'status': response.status,
+                    'final_url': str(response.url),
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                    'retry_after': response.headers.get('Retry-After')
+                }
+
+    async def request_with_retries(self, session, method, url, extra_headers=None):
+        error = None
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * (2 ** attempt)
+            try:
+                result = await self.request(session, method, url, extra_headers)
+                if result['status'] not in RETRY_STATUSES or attempt == self.retries:
+                    return result, None
+                retry_after = result['retry_after']
+                if retry_after and retry_after.isdigit():
+                    delay = max(delay, min(int(retry_after), 30))
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = str(e) or e.__class__.__name__
+                if attempt == self.retries:
+                    break
+            except ValueError as e:
+                return None, str(e) # Malformed URL, retrying won't help
+            await asyncio.sleep(delay)
+        return None, error
+
+    async def check_url(self, session, url, extra_headers=None):
+        """Result: {ok, status, final_url, etag, last_modified, method, error}. status is
+        'Connection Error' when no response could be obtained, 304 when a conditional
+        request found the cached result still valid."""
+        result, error = await self.request_with_retries(session, 'HEAD', url, extra_headers)
+        method = 'HEAD'
+        if result is not None and result['status'] in HEAD_REJECTED_STATUSES:
+            get_result, get_error = await self.request_with_retries(session, 'GET', url, extra_headers)
+            if get_result is not None:
+                result, method = get_result, 'GET'
+
+        if result is None:
+            return {'ok': False, 'status': 'Connection Error', 'final_url': url, 'etag': None,
+                    'last_modified': None, 'method': method, 'error': error}
+
+        return {
+            'ok': result['status'] < 400,
+            'status': result['status'],
+            'final_url': result['final_url'],
+            'etag': result['etag'],
+            'last_modified': result['last_modified'],
+            'method': method,
+            'error': None
+        }
+
+
+def outcome_class(url, result):
+    status = result['status']
+    if not isinstance(status, int):
+        return 'connection_error'
+    if status == 429 or status >= 500:
+        return 'server_error'
+    if status >= 400:
+        return 'client_error'
+    if result['final_url'] != url:
+        return 'redirect'
+    return 'ok'
+
+
+class LinkCache:
+    """Persistent SQLite cache of link check results, shared across audit runs."""
+
+    def __init__(self, path, ttls=None):
+        self.path = path
+        self.ttls = dict(DEFAULT_CACHE_TTLS, **(ttls or {}))
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS links (
+                url TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                ok INTEGER NOT NULL,
+                final_url TEXT,
+                etag TEXT,
+                last_modified TEXT,
+                checked_at REAL NOT NULL
+            )
+        """)
+
+    def get(self, url):
+        row = self.conn.execute(
+            "SELECT status, ok, final_url, etag, last_modified, checked_at FROM links WHERE url = ?", (url,)
+        ).fetchone()
+        if not row:
+            return None
+        status, ok, final_url, etag, last_modified, checked_at = row
+        return {
+            'ok': bool(ok),
+            'status': int(status) if status.isdigit() else status,
+            'final_url': final_url,
+            'etag': etag,
+            'last_modified': last_modified,
+            'checked_at': checked_at
+        }
+
+    def is_fresh(self, url, entry, now=None):
+        now = now or time.time()
+        return now - entry['checked_at'] < self.ttls[outcome_class(url, entry)]
+
+    def put(self, url, result, checked_at=None):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO links (url, status, ok, final_url, etag, last_modified, checked_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (url, str(result['status']), int(result['ok']), result.get('final_url'), result.get('etag'),
+             result.get('last_modified'), checked_at or time.time())
+        )
+
+    def prune(self, max_age):
+        self.conn.execute("DELETE FROM links WHERE checked_at < ?", (time.time() - max_age,))
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
@@ -0,0 +1,451 @@
+import os
+import re
+import gzip
+from html.parser import HTMLParser
+from urllib.parse import urlparse
+
+from bs4.element import NavigableString, PreformattedString, Script, Stylesheet
+
+import minhash
+
+# Check classes run by SEOAudit.analyze_page, in registration order
+PAGE_CHECKS = []
+
+
+def register_check(cls):
+    """Class decorator that adds a check to PAGE_CHECKS."""
+    PAGE_CHECKS.append(cls)
+    return cls
+
+
+class PageCheck:
+    """Base class for per-page checks.
+
+    A check lists the events it wants in `tags`: a tag name for start tags
+    ('*' for every start tag), '/name' for end tags and '#text' for text
+    outside <script>/<style>. During the single pass over a page the engine
+    calls visit(name, attrs) for each matching event, with attrs shaped like
+    BeautifulSoup's (class is a list; None for end tags, the string for text),
+    then calls finish() once. One instance is created per page.
+    """
+    tags = ()
+
+    def __init__(self, audit, full_path, result):
+        self.audit = audit
+        self.full_path = full_path
+        self.result = result
+
+    def visit(self, name, attrs):
+        pass
+
+    def finish(self):
+        pass
+
+    def log(self, level, message, score_deduction=0, rule=None):
+        # rule identifies the issue in machine-readable reports; defaults to the check's class name
+        self.result['logs'].append((level, f"{self.result['rel_path']}: {message}", score_deduction,
+                                    rule or self.__class__.__name__))
+
+
+def run_checks(audit, full_path, result, elements, check_classes=None):
+    """Dispatch one stream of (name, attrs) elements to every registered check
+    (or to check_classes, when given)."""
+    if check_classes is None:
+        check_classes = audit.page_checks
+    checks = [cls(audit, full_path, result) for cls in check_classes]
+    by_tag = {}
+    every_tag = []
+    for check in checks:
+        for tag in check.tags:
+            if tag == '*':
+                every_tag.append(check.visit)
+            else:
+                by_tag.setdefault(tag, []).append(check.visit)
+
+    for name, attrs in elements:
+        for visit in by_tag.get(name, ()):
+            visit(name, attrs)
+        if every_tag and name[0] not in '/#':
+            for visit in every_tag:
+                visit(name, attrs)
+
+    for check in checks:
+        check.finish()
+
+
+def soup_elements(soup):
+    """Start tag, text and end tag events of a parsed document, in document order."""
+    stack = [(None, iter(soup.contents))]
+    while stack:
+        tag, children = stack[-1]
+        node = next(children, None)
+        if node is None:
+            stack.pop()
+            if tag is not None:
+                yield '/' + tag.name, None
+            continue
+        if isinstance(node, NavigableString):
+            if not isinstance(node, (PreformattedString, Script, Stylesheet)):
+                yield '#text', str(node)
+            continue
+        yield node.name, node.attrs
+        stack.append((node, iter(node.contents)))
+
+
+# Attributes BeautifulSoup splits into lists of values (its html.parser defaults)
+CDATA_LIST_ATTRIBUTES = {
+    '*': {'class', 'accesskey', 'dropzone'},
+    'a': {'rel', 'rev'},
+    'link': {'rel', 'rev'},
+    'td': {'headers'},
+    'th': {'headers'},
+    'form': {'accept-charset'},
+    'object': {'archive'},
+    'area': {'rel'},
+    'icon': {'sizes'},
+    'iframe': {'sandbox'},
+    'output': {'for'}
+}
+# Elements BeautifulSoup closes as soon as they open (its html.parser defaults)
+VOID_ELEMENTS = {
+    'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input', 'keygen', 'link', 'menuitem', 'meta',
+    'param', 'source', 'track', 'wbr', 'basefont', 'bgsound', 'command', 'frame', 'image', 'isindex',
+    'nextid', 'spacer'
+}
+PRESERVE_WHITESPACE_TAGS = {'pre', 'textarea'}
+ASCII_SPACES = ' \n\t\x0c\r'
+STREAM_CHUNK_SIZE = 64 * 1024
+_NONWHITESPACE_RE = re.compile(r"\S+")
+
+
+class ElementScanner(HTMLParser):
+    """Collects start tag, text and end tag events without building a tree.
+
+    Events match soup_elements on well-formed pages: attrs follow BeautifulSoup's
+    html.parser conventions (valueless attributes become '', a repeated
+    attribute keeps its last value, list attributes such as class are split),
+    void elements such as <br> end straight away, an end tag closes any
+    elements still open inside it, whitespace-only text collapses to one
+    character, and adjacent text is merged.
+    """
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.elements = []
+        self.text = []
+        self.open_tags = []
+
+    def flush_text(self):
+        if self.text:
+            text = ''.join(self.text)
+            self.text = []
+            if not text.strip(ASCII_SPACES) and not PRESERVE_WHITESPACE_TAGS.intersection(self.open_tags):
+                text = '\n' if '\n' in text else ' '
+            self.elements.append(('#text', text))
+
+    def handle_starttag(self, tag, attrs):
+        self.flush_text()
+        attr_dict = {}
+        for key, value in attrs:
+            attr_dict[key] = '' if value is None else value
+        for key in CDATA_LIST_ATTRIBUTES['*'] | CDATA_LIST_ATTRIBUTES.get(tag, set()):
+            if key in attr_dict:
+                attr_dict[key] = _NONWHITESPACE_RE.findall(attr_dict[key])
+        self.elements.append((tag, attr_dict))
+        if tag in VOID_ELEMENTS:
+            self.elements.append(('/' + tag, None))
+        else:
+            self.open_tags.append(tag)
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_ELEMENTS:
+            self.handle_endtag(tag)
+
+    def handle_endtag(self, tag):
+        # Void elements closed when they opened; end tags with nothing to close are ignored
+        if tag in VOID_ELEMENTS or tag not in self.open_tags:
+            return
+        self.flush_text()
+        while True:
+            name = self.open_tags.pop()
+            self.elements.append(('/' + name, None))
+            if name == tag:
+                break
+
+    def handle_data(self, data):
+        if self.cdata_elem is None: # <script>/<style> bodies are not page text
+            self.text.append(data)
+
+    # Comments and declarations split text into separate strings, as in the soup
+    def handle_comment(self, data):
+        self.flush_text()
+
+    def handle_decl(self, decl):
+        self.flush_text()
+
+    def handle_pi(self, data):
+        self.flush_text()
+
+    def unknown_decl(self, data):
+        self.flush_text()
+
+    def close(self):
+        super().close()
+        self.flush_text()
+        while self.open_tags:
+            self.elements.append(('/' + self.open_tags.pop(), None))
+
+
+def stream_elements(f):
+    """Start tag, text and end tag events of an open HTML file, in document order.
+
+    The file is fed to HTMLParser in chunks and elements are handed out as
+    they are found, so memory stays flat however large the page is.
+    """
+    scanner = ElementScanner()
+    while True:
+        chunk = f.read(STREAM_CHUNK_SIZE)
+        if not chunk:
+            break
+        scanner.feed(chunk)
+        yield from scanner.elements
+        scanner.elements.clear()
+    scanner.close()
+    yield from scanner.elements
+
+
+# --- Semantics Checks ---
+
+@register_check
+class H1Check(PageCheck):
+    tags = ('h1',)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.count = 0
+
+    def visit(self, name, attrs):
+        self.count += 1
+
+    def finish(self):
+        if self.count == 0:
+            self.log('ERROR', "Missing <h1> tag", 5, 'missing-h1')
+        elif self.count > 1:
+            self.log('WARN', "Multiple <h1> tags found", 2, 'multiple-h1')
+
+
+@register_check
+class SchemaCheck(PageCheck):
+    tags = ('script',)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.found = False
+
+    def visit(self, name, attrs):
+        if attrs.get('type') == 'application/ld+json':
+            self.found = True
+
+    def finish(self):
+        if not self.found:
+            self.log('WARN', "Missing JSON-LD Schema", 2, 'missing-schema')
+
+
+@register_check
+class BreadcrumbCheck(PageCheck):
+    tags = ('*',)
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.found = False
+
+    def visit(self, name, attrs):
+        if self.found:
+            return
+        if attrs.get('aria-label') == 'breadcrumb' or any('breadcrumb' in c for c in attrs.get('class', ())):
+            self.found = True
+
+    def finish(self):
+        if not self.found and self.result['rel_path'] != 'index.html': # Skip for home
+            self.log('WARN', "Missing Breadcrumb", 0, 'missing-breadcrumb') # Just log, maybe not critical for all pages
+
+
+# --- Content ---
+
+@register_check
+class ContentCheck(PageCheck):
+    """Records the title, meta description and a MinHash signature of the main
+    text (<article>, else <main>, else the page minus head and boilerplate)
+    for the cross-page duplicate report."""
+    SECTIONS = ('head', 'title', 'article', 'main', 'nav', 'header', 'footer', 'aside')
+    BOILERPLATE = ('head', 'nav', 'header', 'footer', 'aside')
+    tags = SECTIONS + tuple('/' + t for t in SECTIONS) + ('meta', '#text')
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.depth = dict.fromkeys(self.SECTIONS, 0)
+        self.titles_seen = 0
+        self.title = []
+        self.description = None
+        self.article = []
+        self.main = []
+        self.rest = []
+
+    def visit(self, name, attrs):
+        if name == '#text':
+            if self.depth['title'] and self.titles_seen == 1: # The first <title>; SVG icons can carry their own
+                self.title.append(attrs)
+            if self.depth['article']:
+                self.article.append(attrs)
+            if self.depth['main']:
+                self.main.append(attrs)
+            if not any(self.depth[t] for t in self.BOILERPLATE):
+                self.rest.append(attrs)
+        elif name == 'meta':
+            if self.description is None and attrs.get('name', '').lower() == 'description':
+                self.description = attrs.get('content', '')
+        elif name[0] == '/':
+            self.depth[name[1:]] = max(0, self.depth[name[1:]] - 1)
+        else:
+            self.depth[name] += 1
+            if name == 'title':
+                self.titles_seen += 1
+
+    def finish(self):
+        text = ' '.join(self.article or self.main or self.rest)
+        shingle_set = minhash.shingles(text)
+        self.result['title'] = ' '.join(''.join(self.title).split())
+        self.result['description'] = ' '.join((self.description or '').split())
+        self.result['content_shingles'] = len(shingle_set)
+        self.result['content_signature'] = minhash.signature(shingle_set)
+
+
+# --- Performance ---
+
+def srcset_largest(srcset):
+    """URL of the widest (or highest density) candidate in a srcset."""
+    best_url, best_size = None, -1.0
+    for candidate in srcset.split(','):
+        parts = candidate.split()
+        if not parts:
+            continue
+        size = 1.0
+        if len(parts) > 1 and parts[1][-1:] in ('w', 'x'):
+            try:
+                size = float(parts[1][:-1])
+            except ValueError:
+                pass
+        if size > best_size:
+            best_url, best_size = parts[0], size
+    return best_url
+
+
+@register_check
+class PerformanceCheck(PageCheck):
+    """Records what makes a page slow to load: HTML size, render-blocking
+    resources in <head>, third-party origins and the images it pulls in.
+    Budgets are applied by SEOAudit.analyze_performance."""
+    tags = ('head', '/head', 'script', 'link', 'img', 'source', 'picture', '/picture', 'iframe', 'video', 'audio')
+
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.in_head = 0
+        self.picture_source = None # First <source> srcset in the open <picture>
+        self.render_blocking = []
+        self.origins = set()
+        self.images = []
+
+    def note_origin(self, url):
+        if url and (url.startswith('//') or url.startswith('http://') or url.startswith('https://')):
+            host = urlparse(url if not url.startswith('//') else 'https:' + url).netloc
+            site_host = urlparse(self.audit.base_url).netloc if self.audit.base_url else None
+            if host and host != site_host:
+                self.origins.add(host)
+
+    def visit(self, name, attrs):
+        if name == 'head':
+            self.in_head += 1
+        elif name == '/head':
+            self.in_head = max(0, self.in_head - 1)
+        elif name == 'picture':
+            self.picture_source = None
+        elif name == '/picture':
+            self.picture_source = None
+        elif name == 'script':
+            src = attrs.get('src')
+            self.note_origin(src)
+            # Classic scripts without async/defer stop the parser; modules are deferred by default
+            if src and self.in_head and 'async' not in attrs and 'defer' not in attrs and attrs.get('type') != 'module':
+                self.render_blocking.append(src)
+        elif name == 'link':
+            rel = attrs.get('rel', ())
+            if set(rel) & {'stylesheet', 'preload', 'modulepreload', 'icon'}:
+                self.note_origin(attrs.get('href'))
+            if 'stylesheet' in rel and self.in_head and 'disabled' not in attrs and attrs.get('media', 'all') != 'print':
+                self.render_blocking.append(attrs.get('href', ''))
+        elif name == 'source':
+            if attrs.get('srcset'):
+                self.note_origin(srcset_largest(attrs['srcset']))
+                if self.picture_source is None:
+                    self.picture_source = attrs['srcset']
+            else:
+                self.note_origin(attrs.get('src'))
+        elif name == 'img':
+            # Worst case for a desktop browser: the first <picture> source (preferred format),
+            # else the largest srcset candidate, else src
+            srcset = self.picture_source or attrs.get('srcset')
+            url = srcset_largest(srcset) if srcset else attrs.get('src')
+            self.note_origin(url)
+            if url:
+                self.images.append(url)
+        else: # iframe, video, audio
+            self.note_origin(attrs.get('src'))
+
+    def finish(self):
+        html_bytes = html_gzip_bytes = None
+        if self.full_path: # Crawled pages have no file; the crawler measures transfer size instead
+            data = self.audit.read_page_bytes(self.full_path)
+            html_bytes = len(data)
+            html_gzip_bytes = len(gzip.compress(data, compresslevel=6)) # Typical server setting
+        self.result['performance'] = {
+            'html_bytes': html_bytes,
+            'html_gzip_bytes': html_gzip_bytes,
+            'render_blocking': self.render_blocking,
+            'third_party_origins': sorted(self.origins),
+            'images': self.images # Sized when the report runs, so cached results never go stale
+        }
+
+
+# --- Link Analysis ---
+
+@register_check
+class LinkCheck(PageCheck):
+    tags = ('a',)
+
+    def visit(self, name, attrs):
+        audit = self.audit
+        result = self.result
+        if attrs.get('href') is None:
+            return
+        href = attrs['href'].strip()
+        if any(href.startswith(p) for p in audit.money_url_prefixes):
+            result['money_links'] += 1
+
+        # Skip ignored
+        if any(href.startswith(p) for p in audit.ignore_url_prefixes) or 'cdn-cgi' in href:
+            return
+
+        if href.startswith('http://') or href.startswith('https://'):
+            # External Link, unless it is this site written as a full URL (handled as local below)
+            if not (audit.base_url and href.startswith(audit.base_url)):
+                result['external_links'].append(href)
+                return
+
+        # Format Checks
+        format_issues = audit.check_link_format(href, result['rel_path'])
+
+        # Dead Link & Resolution (None = dead)
+        target_file = audit.resolve_local_path(self.full_path, href)
+        target_rel = os.path.relpath(target_file, audit.root_dir) if target_file else None
+        result['internal_links'].append([href, format_issues, target_rel])
@@ -0,0 +1,134 @@
+import os
+import re
+
+DEFAULT_STATUS = 302
+REDIRECT_STATUSES = {301, 302, 303, 307, 308}
+REWRITE_STATUS = 200 # Served from the destination without a redirect
+MAX_HOPS = 10
+
+# A splat, or a placeholder that starts a path segment
+SOURCE_TOKEN_RE = re.compile(r'\*|(?<=/):([A-Za-z]\w*)')
+DESTINATION_TOKEN_RE = re.compile(r':([A-Za-z]\w*)')
+
+
+def parse_redirects(text):
+    """Rules from a _redirects file as (line number, source, destination, status),
+    in file order, plus a list of (line number, problem) for lines that were skipped."""
+    rules = []
+    errors = []
+    for number, line in enumerate(text.splitlines(), 1):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        parts = line.split()
+        if len(parts) not in (2, 3):
+            errors.append((number, f"expected 'source destination [status]', got: {line}"))
+            continue
+        status = DEFAULT_STATUS
+        if len(parts) == 3:
+            code = parts[2].rstrip('!') # Netlify's forced rules ("301!")
+            if not code.isdigit() or int(code) not in REDIRECT_STATUSES | {REWRITE_STATUS}:
+                errors.append((number, f"unsupported status {parts[2]}"))
+                continue
+            status = int(code)
+        if not parts[0].startswith('/'):
+            errors.append((number, f"source must be a path: {parts[0]}"))
+            continue
+        rules.append((number, parts[0], parts[1], status))
+    return rules, errors
+
+
+def compile_source(source):
+    """Regex for a source with a splat (*) and/or :placeholders, or None for a plain path."""
+    pattern = []
+    pos = 0
+    for match in SOURCE_TOKEN_RE.finditer(source):
+        pattern.append(re.escape(source[pos:match.start()]))
+        pattern.append('(?P<splat>.*)' if match.group() == '*' else f"(?P<{match.group(1)}>[^/]+)")
+        pos = match.end()
+    if not pos:
+        return None
+    pattern.append(re.escape(source[pos:]))
+    return re.compile(''.join(pattern))
+
+
+def is_site_path(url):
+    return url.startswith('/') and not url.startswith('//')
+
+
+class RedirectMap:
+    """Compiled _redirects rules.
+
+    Plain sources go in a dict; splat and placeholder sources are compiled to
+    regexes. Lookups honour file order like the host does: the first matching
+    rule wins, so a dynamic rule only beats an exact one when it comes first.
+    """
+
+    def __init__(self, rules=(), errors=()):
+        self.exact = {} # source -> (order, destination, status)
+        self.dynamic = [] # (order, regex, destination, status), in file order
+        self.errors = list(errors)
+        for order, (number, source, destination, status) in enumerate(rules):
+            try:
+                regex = compile_source(source)
+            except re.error as e:
+                self.errors.append((number, f"invalid source {source}: {e}"))
+                continue
+            if regex is not None:
+                self.dynamic.append((order, regex, destination, status))
+            elif source not in self.exact:
+                self.exact[source] = (order, destination, status)
+
+    @classmethod
+    def load(cls, path):
+        """Map for the _redirects file at path; an empty map if there is none."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, 'r', encoding='utf-8') as f:
+            return cls(*parse_redirects(f.read()))
+
+    def __len__(self):
+        return len(self.exact) + len(self.dynamic)
+
+    def lookup(self, path):
+        """(destination, status) of the first rule matching a site path, or None."""
+        exact = self.exact.get(path)
+        for order, regex, destination, status in self.dynamic:
+            if exact and order > exact[0]:
+                break
+            match = regex.fullmatch(path)
+            if match:
+                params = match.groupdict()
+                return DESTINATION_TOKEN_RE.sub(lambda m: params.get(m.group(1), m.group()), destination), status
+        if exact:
+            return exact[1], exact[2]
+        return None
+
+    def follow(self, path, base_url=None, max_hops=MAX_HOPS):
+        """Follow rules from a site path until the destination matches no rule.
+
+        base_url turns absolute URLs on this site back into paths so chains
+        through them are followed too. Returns (hops, loop): hops is a list of
+        (path, destination, status) and loop is True when a path repeats or
+        the chain is longer than max_hops.
+        """
+        hops = []
+        seen = {path}
+        while len(hops) < max_hops:
+            rule = self.lookup(path)
+            if rule is None:
+                return hops, False
+            destination, status = rule
+            hops.append((path, destination, status))
+            if base_url and destination.startswith(base_url):
+                destination = destination[len(base_url):] or '/'
+            if not is_site_path(destination):
+                return hops, False # Leaves the site
+            destination_path = destination.split('#')[0].split('?')[0]
+            if status == REWRITE_STATUS and destination_path == path:
+                return hops, False # Rewrite onto itself: the file is served as-is
+            path = destination_path
+            if path in seen:
+                return hops, True
+            seen.add(path)
+        return hops, self.lookup(path) is not None
@@ -0,0 +1,98 @@
+import heapq
+import json
+from collections import Counter
+
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+SARIF_LEVELS = {'ERROR': 'error', 'WARN': 'warning'}
+
+
+class ReportSink:
+    """Streams audit issues to JSON Lines and/or SARIF files as they are found.
+
+    Only counters are kept in memory (issues per rule and level, score lost
+    by at most tracked_pages pages), so the report of a very large site costs
+    no more memory than a small one. Either path may be None; the summary is
+    kept regardless.
+    """
+
+    def __init__(self, jsonl_path=None, sarif_path=None, tool_name='seo-audit', top_pages=20, tracked_pages=None):
+        self.tool_name = tool_name
+        self.top_pages = top_pages
+        self.tracked_pages = tracked_pages or top_pages * 50
+        self.rule_counts = Counter()
+        self.rule_deductions = Counter()
+        self.level_counts = Counter()
+        self.page_deductions = {} # page -> [score lost, overcount], at most tracked_pages entries
+        self.page_heap = [] # (score lost, page), smallest first; entries for since-changed totals are skipped
+        self.jsonl = open(jsonl_path, 'w', encoding='utf-8') if jsonl_path else None
+        self.sarif = open(sarif_path, 'w', encoding='utf-8') if sarif_path else None
+        self.sarif_results = 0
+        if self.sarif:
+            # Results are written as they arrive; the tool section (which lists the rules seen) goes last
+            self.sarif.write(f'{{"$schema": "{SARIF_SCHEMA}", "version": "2.1.0", "runs": [{{"results": [\n')
+
+    def add(self, level, rule, message, page=None, score_deduction=0):
+        self.rule_counts[rule] += 1
+        self.rule_deductions[rule] += score_deduction
+        self.level_counts[level] += 1
+        if page and score_deduction:
+            self.add_page_deduction(page, score_deduction)
+
+        if self.jsonl:
+            record = {'type': 'issue', 'level': level, 'rule': rule, 'page': page,
+                      'message': message, 'score_deduction': score_deduction}
+            self.jsonl.write(json.dumps(record, ensure_ascii=False) + '\n')
+        if self.sarif:
+            result = {'ruleId': rule, 'level': SARIF_LEVELS.get(level, 'note'), 'message': {'text': message},
+                      'properties': {'scoreDeduction': score_deduction}}
+            if page:
+                result['locations'] = [{'physicalLocation': {'artifactLocation': {'uri': page}}}]
+            self.sarif.write((',\n' if self.sarif_results else '') + json.dumps(result, ensure_ascii=False))
+            self.sarif_results += 1
+
+    def add_page_deduction(self, page, amount):
+        """Space-Saving counter: when the table is full, the page that has lost the
+        fewest points makes room and a newcomer starts from its total. Exact while
+        no more than tracked_pages pages lose points; beyond that the pages losing
+        the most are still kept, with the inherited total recorded as overcount."""
+        entry = self.page_deductions.get(page)
+        if entry is None:
+            floor = self.evict_page() if len(self.page_deductions) >= self.tracked_pages else 0
+            entry = self.page_deductions[page] = [floor, floor]
+        entry[0] += amount
+        heapq.heappush(self.page_heap, (entry[0], page))
+        if len(self.page_heap) > 4 * self.tracked_pages:
+            # Drop stale entries so the heap stays proportional to the table
+            self.page_heap = [(lost, page) for page, (lost, _) in self.page_deductions.items()]
+            heapq.heapify(self.page_heap)
+
+    def evict_page(self):
+        while True:
+            lost, page = heapq.heappop(self.page_heap)
+            entry = self.page_deductions.get(page)
+            if entry and entry[0] == lost:
+                del self.page_deductions[page]
+                return lost
+
+    def summary(self):
+        return {
+            'levels': dict(self.level_counts),
+            'rules': {rule: {'count': count, 'score_deduction': self.rule_deductions[rule]}
+                      for rule, count in sorted(self.rule_counts.items())},
+            # Points each page lost for certain (less the overcount inherited on eviction)
+            'worst_pages': [[page, lost] for lost, page in
+                            heapq.nlargest(self.top_pages, ((lost - over, page) for page, (lost, over) in self.page_deductions.items()))]
+        }
+
+    def close(self, score=None, stats=None):
+        """Write the summary record and finish both files."""
+        summary = dict(self.summary(), score=score, stats=stats)
+        if self.jsonl:
+            self.jsonl.write(json.dumps(dict(type='summary', **summary), ensure_ascii=False) + '\n')
+            self.jsonl.close()
+            self.jsonl = None
+        if self.sarif:
+            driver = {'name': self.tool_name, 'rules': [{'id': rule} for rule in sorted(self.rule_counts)]}
+            self.sarif.write(f'\n], "tool": {{"driver": {json.dumps(driver)}}}, "properties": {json.dumps(summary, ensure_ascii=False)}}}]}}\n')
+            self.sarif.close()
+            self.sarif = None
@@ -0,0 +1,135 @@
+import os
+import zlib
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse
+
+SITEMAP_NS = '{http://www.sitemaps.org/schemas/sitemap/0.9}'
+CHUNK_SIZE = 64 * 1024
+GZIP_MAGIC = b'\x1f\x8b'
+MAX_INDEX_DEPTH = 3 # sitemapindex files may only list sitemaps, but guard against cycles anyway
+# Tags looked up by full name (namespaced or not); cheaper than splitting every tag
+ENTRY_TAGS = {SITEMAP_NS + 'url': 'url', 'url': 'url', SITEMAP_NS + 'sitemap': 'sitemap', 'sitemap': 'sitemap'}
+FIELD_TAGS = {SITEMAP_NS + 'loc': 'loc', 'loc': 'loc', SITEMAP_NS + 'lastmod': 'lastmod', 'lastmod': 'lastmod'}
+
+
+class EntryCollector:
+    """XMLParser target that turns <url> / <sitemap> elements into (kind, loc, lastmod) entries."""
+
+    def __init__(self):
+        self.entries = []
+        self.kind = None # 'url' or 'sitemap' while inside an entry
+        self.field = None # 'loc' or 'lastmod' while inside one of those
+        self.text = []
+        self.values = {}
+
+    def start(self, tag, attrib):
+        if self.kind is None:
+            self.kind = ENTRY_TAGS.get(tag)
+            self.values = {}
+        else:
+            # Extension elements (image:loc, xhtml:link, ...) are namespaced and don't match
+            self.field = FIELD_TAGS.get(tag)
+            self.text = []
+
+    def data(self, text):
+        if self.field:
+            self.text.append(text)
+
+    def end(self, tag):
+        if self.field:
+            self.values[self.field] = ''.join(self.text).strip()
+            self.field = None
+        elif self.kind and ENTRY_TAGS.get(tag) == self.kind:
+            if self.values.get('loc'):
+                self.entries.append((self.kind, self.values['loc'], self.values.get('lastmod') or None))
+            self.kind = None
+
+    def close(self):
+        pass
+
+
+class SitemapParser:
+    """Incremental parser for <urlset> and <sitemapindex> documents.
+
+    Bytes are fed in chunks (gzip is detected and decompressed on the fly).
+    Parser events go straight to an EntryCollector, so no element tree is
+    built and memory stays flat however large the file is. feed() and close()
+    return the (kind, loc, lastmod) entries completed so far, kind being
+    'url' or 'sitemap'.
+    """
+
+    def __init__(self):
+        self.collector = EntryCollector()
+        self.parser = ET.XMLParser(target=self.collector)
+        self.decompressor = None
+        self.sniffed = b''
+
+    def feed(self, data):
+        if self.sniffed is not None:
+            # Look at the first two bytes before deciding whether this is a .gz shard
+            data = self.sniffed + data
+            if len(data) < 2:
+                self.sniffed = data
+                return []
+            self.sniffed = None
+            if data.startswith(GZIP_MAGIC):
+                self.decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self.decompressor:
+            # Inflate at most CHUNK_SIZE at a time: sitemaps compress very well
+            data = self.decompressor.decompress(data, CHUNK_SIZE)
+            self.parser.feed(data)
+            while self.decompressor.unconsumed_tail:
+                self.parser.feed(self.decompressor.decompress(self.decompressor.unconsumed_tail, CHUNK_SIZE))
+        else:
+            self.parser.feed(data)
+        return self.take_entries()
+
+    def close(self):
+        if self.sniffed:
+            self.parser.feed(self.sniffed)
+        if self.decompressor:
+            self.parser.feed(self.decompressor.flush())
+        self.parser.close()
+        return self.take_entries()
+
+    def take_entries(self):
+        entries, self.collector.entries = self.collector.entries, []
+        return entries
+
+
+def read_chunks(f, size=CHUNK_SIZE):
+    while True:
+        chunk = f.read(size)
+        if not chunk:
+            return
+        yield chunk
+
+
+def iter_sitemap(path, root_dir=None, depth=0):
+    """Yield (loc, lastmod) for every URL in a local sitemap, lazily.
+
+    Sitemap index entries are followed by mapping their URL path onto
+    root_dir (default: the sitemap's directory), so index files and .xml.gz
+    shards written next to sitemap.xml are read as they would be served.
+    """
+    if root_dir is None:
+        root_dir = os.path.dirname(os.path.abspath(path))
+    parser = SitemapParser()
+    with open(path, 'rb') as f:
+        for chunk in read_chunks(f):
+            yield from _expand(parser.feed(chunk), root_dir, depth)
+    yield from _expand(parser.close(), root_dir, depth)
+
+
+def _expand(entries, root_dir, depth):
+    for kind, loc, lastmod in entries:
+        if kind == 'url':
+            yield loc, lastmod
+            continue
+        child_path = os.path.join(root_dir, urlparse(loc).path.lstrip('/'))
+        if depth >= MAX_INDEX_DEPTH:
+            print(f"Warning: Sitemap index nested too deeply, skipping {loc}")
+        elif not os.path.exists(child_path):
+            print(f"Warning: Sitemap {loc} not found at {child_path}")
+        else:
+            yield from iter_sitemap(child_path, root_dir, depth + 1)
@@ -1,100 +1,247 @@
-import urllib.request
+# Dependencies:
+# pip install aiohttp
+
+import asyncio
 import json
-import ssl
+import sqlite3
+import time
+import zlib
 import xml.etree.ElementTree as ET
 import os
+import argparse
+from urllib.parse import urlparse
+
+import aiohttp
+
+from sitemaps import iter_sitemap
+
+HOST = "ythezu.top"
+KEY = "94f28ee04780468888bc7c96238dc868"
+# IndexNow endpoints; participating engines share submissions, several are asked so one outage doesn't lose a run
+DEFAULT_ENDPOINTS = [
+    "https://api.indexnow.org/indexnow",
+    "https://www.bing.com/indexnow",
+    "https://yandex.com/indexnow"
+]
+MAX_URLS_PER_REQUEST = 10000 # Protocol limit per POST
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+LEDGER_PATH = os.path.join(CURRENT_DIR, '.audit_cache', 'indexnow.sqlite')
+LASTMOD_LEDGER_PATH = os.path.join(CURRENT_DIR, 'lastmod.json') # Written by build.py: content hash per page
+
+class SubmissionLedger:
+    """URLs already submitted to IndexNow, with the version of the page that was submitted.
+
+    The version is the page's content hash from build.py's lastmod.json when
+    known, its sitemap lastmod otherwise, so a page is only resubmitted after
+    it really changed.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self.conn = sqlite3.connect(path)
+        self.conn.execute("CREATE TABLE IF NOT EXISTS submitted (url TEXT PRIMARY KEY, version TEXT NOT NULL, submitted_at REAL NOT NULL)")
+
+    def entries(self):
+        return dict(self.conn.execute("SELECT url, version FROM submitted"))
+
+    def record(self, versions):
+        now = time.time()
+        self.conn.executemany("INSERT OR REPLACE INTO submitted (url, version, submitted_at) VALUES (?, ?, ?)",
+                              ((url, version, now) for url, version in versions.items()))
+        self.conn.commit()
 
-def get_urls_from_sitemap(sitemap_path):
-    """Parse local sitemap.xml to extract URLs."""
-    urls = []
+    def forget(self, urls):
+        self.conn.executemany("DELETE FROM submitted WHERE url = ?", ((url,) for url in urls))
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+def load_content_hashes():
+    # Clean URL path -> content hash, from the build's lastmod ledger (missing before the first build)
     try:
-        if not os.path.exists(sitemap_path):
-            print(f"Warning: Sitemap not found at {sitemap_path}")
-            return []
-
-        tree = ET.parse(sitemap_path)
-        root = tree.getroot()
-        
-        # Handle the default namespace in sitemap.xml
-        # Standard sitemap namespace is usually http://www.sitemaps.org/schemas/sitemap/0.9
-        namespace = ''
-        if '}' in root.tag:
-            namespace = root.tag.split('}')[0] + '}'
-            
-        for url in root.findall(f'{namespace}url'):
-            loc = url.find(f'{namespace}loc')
-            if loc is not None and loc.text:
-                urls.append(loc.text.strip())
-        
-        print(f"Found {len(urls)} URLs in sitemap.")
-        return urls
-    except Exception as e:
-        print(f"Error parsing sitemap: {e}")
-        return []
-
-def submit_to_indexnow():
-    # Configuration
-    host = "ythezu.top"
-    key = "94f28ee04780468888bc7c96238dc868"
-    key_location = f"https://{host}/{key}.txt"
-    
+        with open(LASTMOD_LEDGER_PATH, 'r', encoding='utf-8') as f:
+            return {url: entry['hash'] for url, entry in json.load(f).items()}
+    except (OSError, ValueError, KeyError, TypeError):
+        return {}
+
+def diff_against_ledger(versions, submitted):
+    """Split the sitemap into (new, changed, deleted) URL lists against the ledger."""
+    new = [url for url in versions if url not in submitted]
+    changed = [url for url in versions if url in submitted and submitted[url] != versions[url]]
+    deleted = sorted(set(submitted) - set(versions))
+    return new, changed, deleted
+
+def chunks(items, size=MAX_URLS_PER_REQUEST):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+class IndexNowSubmitter:
+    """Sends URL lists to several IndexNow endpoints at once.
+
+    All endpoints share one pool of keep-alive connections and run
+    concurrently, so a submission takes about as long as the slowest endpoint.
+    Chunks for one endpoint go out one after another, at least min_interval
+    seconds apart; 429/5xx answers are retried with exponential backoff,
+    honouring Retry-After. Per-endpoint results end up in self.status.
+    """
+
+    def __init__(self, endpoints=None, timeout=30, min_interval=1.0, retries=4, backoff=2.0):
+        self.endpoints = list(endpoints or DEFAULT_ENDPOINTS)
+        self.timeout = timeout
+        self.min_interval = min_interval
+        self.retries = retries
+        self.backoff = backoff
+        self.status = {} # endpoint -> {accepted, requests, retries, last_status, error, seconds}
+
+    def submit(self, url_list):
+        """Submit URLs to every endpoint. Blocking wrapper around submit_async; returns self.status."""
+        return asyncio.run(self.submit_async(url_list))
+
+    async def submit_async(self, url_list):
+        self.status = {}
+        connector = aiohttp.TCPConnector(limit_per_host=1, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.timeout)
+        headers = {'Content-Type': 'application/json; charset=utf-8'}
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=headers) as session:
+            await asyncio.gather(*(self.submit_endpoint(session, endpoint, url_list) for endpoint in self.endpoints))
+        return self.status
+
+    async def submit_endpoint(self, session, endpoint, url_list):
+        status = self.status[endpoint] = {'accepted': [], 'requests': 0, 'retries': 0, 'last_status': None,
+                                          'error': None, 'seconds': 0.0}
+        started = time.monotonic()
+        next_slot = started
+        for chunk in chunks(url_list):
+            # Prepare the payload
+            data = {
+                "host": HOST,
+                "key": KEY,
+                "keyLocation": f"https://{HOST}/{KEY}.txt",
+                "urlList": chunk
+            }
+            await asyncio.sleep(max(0, next_slot - time.monotonic()))
+            status_code, response_body = await self.post(session, endpoint, data, status)
+            next_slot = time.monotonic() + self.min_interval
+            status['last_status'] = status_code
+            if status_code in (200, 202):
+                status['accepted'].extend(chunk)
+            else:
+                status['error'] = response_body.strip()[:200] or None
+                break # Later chunks would fail the same way (bad key, wrong host, quota)
+        status['seconds'] = time.monotonic() - started
+
+    async def post(self, session, endpoint, data, status):
+        """Returns (status code or None, response text) after retrying 429/5xx and network errors."""
+        for attempt in range(self.retries + 1):
+            delay = self.backoff * (2 ** attempt)
+            status['requests'] += 1
+            try:
+                async with session.post(endpoint, json=data) as response:
+                    body = await response.text(errors='replace')
+                    if response.status not in RETRY_STATUSES or attempt == self.retries:
+                        return response.status, body
+                    retry_after = response.headers.get('Retry-After', '')
+                    if retry_after.isdigit():
+                        delay = max(delay, min(int(retry_after), 300))
+                    print(f"⏳ {response.status} from {endpoint}, retrying in {delay:.0f}s...")
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    return None, str(e) or e.__class__.__name__
+                print(f"⏳ {endpoint}: {str(e) or e.__class__.__name__}, retrying in {delay:.0f}s...")
+            status['retries'] += 1
+            await asyncio.sleep(delay)
+
+def submit_to_indexnow(since=None, endpoints=None, ledger_path=LEDGER_PATH, resubmit_all=False,
+                       include_deleted=True, dry_run=False):
     # Get directory of current script to locate sitemap.xml
-    current_dir = os.path.dirname(os.path.abspath(__file__))
-    sitemap_path = os.path.join(current_dir, "sitemap.xml")
-    
+    sitemap_path = os.path.join(CURRENT_DIR, "sitemap.xml")
+
     # Get URLs from sitemap
     print(f"Reading sitemap from: {sitemap_path}")
-    url_list = get_urls_from_sitemap(sitemap_path)
-    
-    if not url_list:
-        print("No URLs found to submit. Exiting.")
+    if not os.path.exists(sitemap_path):
+        print(f"Warning: Sitemap not found at {sitemap_path}")
         return
+    hashes = load_content_hashes()
+    versions = {} # url -> content hash, or sitemap lastmod when the page isn't in lastmod.json
+    too_old = set() # lastmod before --since
+    try:
+        # Entries stream out of the sitemap (and any index shards), only the version map is kept
+        for loc, lastmod in iter_sitemap(sitemap_path):
+            versions[loc] = hashes.get(urlparse(loc).path) or lastmod or ''
+            # lastmod comes from build.py's content-hash ledger, so it reflects real edits
+            if since and lastmod and lastmod[:10] < since:
+                too_old.add(loc)
+    except (ET.ParseError, zlib.error) as e:
+        print(f"Error parsing sitemap: {e}")
+        return
+    print(f"Found {len(versions)} URLs in sitemap.")
 
-    # IndexNow API Endpoint (Bing is a major provider for IndexNow)
-    endpoint = "https://api.indexnow.org/indexnow"
-
-    # Prepare the payload
-    data = {
-        "host": host,
-        "key": key,
-        "keyLocation": key_location,
-        "urlList": url_list
-    }
+    # Only new and changed pages (and pages gone from the sitemap) need telling the search engines
+    ledger = SubmissionLedger(ledger_path) if ledger_path else None
+    submitted = {} if resubmit_all or not ledger else ledger.entries()
+    new, changed, deleted = diff_against_ledger(versions, submitted)
+    if too_old:
+        new = [url for url in new if url not in too_old]
+        changed = [url for url in changed if url not in too_old]
+    if not include_deleted:
+        deleted = []
+    print(f"{len(new)} new, {len(changed)} changed, {len(deleted)} deleted since the last submission.")
 
-    json_data = json.dumps(data).encode('utf-8')
+    # Deleted URLs are submitted too: engines recrawl them, see the 404 and drop them
+    url_list = new + changed + deleted
+    if not url_list:
+        print("No URLs found to submit. Exiting.")
+        if ledger:
+            ledger.close()
+        return
 
-    # Create request
-    req = urllib.request.Request(
-        endpoint, 
-        data=json_data, 
-        headers={'Content-Type': 'application/json; charset=utf-8'}
-    )
+    if dry_run:
+        for label, urls in (('new', new), ('changed', changed), ('deleted', deleted)):
+            for url in urls:
+                print(f" - [{label}] {url}")
+        if ledger:
+            ledger.close()
+        return
 
-    try:
-        # Create a context that doesn't verify certificates (optional, depends on env)
-        # context = ssl._create_unverified_context()
-        
-        with urllib.request.urlopen(req) as response:
-            status_code = response.getcode()
-            response_body = response.read().decode('utf-8')
-            
-            print(f"Submission Status Code: {status_code}")
-            if status_code == 200 or status_code == 202:
-                print("✅ Successfully submitted URLs to IndexNow!")
-                print("Submitted URLs:")
-                for url in url_list:
-                    print(f" - {url}")
-            else:
-                print(f"❌ Submission failed. Response: {response_body}")
+    submitter = IndexNowSubmitter(endpoints)
+    status = submitter.submit(url_list)
+    for endpoint, result in status.items():
+        mark = "✅" if len(result['accepted']) == len(url_list) else "❌"
+        error = f", {result['error']}" if result['error'] else ''
+        print(f"{mark} {endpoint}: {result['last_status']}, {len(result['accepted'])}/{len(url_list)} URLs accepted, "
+              f"{result['requests']} requests ({result['retries']} retries), {result['seconds']:.1f}s{error}")
 
-    except urllib.error.HTTPError as e:
-        print(f"❌ HTTP Error: {e.code} - {e.reason}")
-        print(e.read().decode('utf-8'))
-    except urllib.error.URLError as e:
-        print(f"❌ URL Error: {e.reason}")
-    except Exception as e:
-        print(f"❌ An error occurred: {str(e)}")
+    # Engines share what any of them accepted, so one endpoint is enough to mark a URL as submitted
+    accepted = set()
+    for result in status.values():
+        accepted.update(result['accepted'])
+    if accepted:
+        print(f"✅ Successfully submitted {len(accepted)} of {len(url_list)} URLs to IndexNow!")
+        print("Submitted URLs:")
+        for url in url_list:
+            if url in accepted:
+                print(f" - {url}")
+    if ledger:
+        # Only what the endpoint accepted is recorded, so failures are retried next run
+        ledger.record({url: versions[url] for url in new + changed if url in accepted})
+        ledger.forget([url for url in deleted if url in accepted])
+        ledger.close()
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Submit new and changed sitemap URLs to IndexNow.")
+    parser.add_argument('--since', help="Only submit URLs whose sitemap lastmod is on or after this date (YYYY-MM-DD)")
+    parser.add_argument('--all', action='store_true', help="Submit every sitemap URL, ignoring the submission ledger")
+    parser.add_argument('--no-deleted', action='store_true', help="Don't submit URLs that dropped out of the sitemap")
+    parser.add_argument('--dry-run', action='store_true', help="Show what would be submitted without sending anything")
+    parser.add_argument('--endpoint', action='append', default=None,
+                        help="IndexNow endpoint to submit to (repeatable; default: " + ', '.join(DEFAULT_ENDPOINTS) + ")")
+    parser.add_argument('--ledger', default=LEDGER_PATH, help="Submission ledger file (default: .audit_cache/indexnow.sqlite)")
+    args = parser.parse_args()
+
     print("Starting IndexNow submission...")
-    submit_to_indexnow()
+    submit_to_indexnow(args.since, endpoints=args.endpoint, ledger_path=args.ledger, resubmit_all=args.all,
+                       include_deleted=not args.no_deleted, dry_run=args.dry_run)
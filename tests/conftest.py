@@ -0,0 +1,107 @@
+import os
+import socket
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'MasterTool'))
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1' # Keep-alive, like the real endpoints
+
+    def handle_any(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0))
+        status, headers, payload = self.server.stub.respond(self.command, self.path, body, dict(self.headers))
+        payload = payload.encode('utf-8') if isinstance(payload, str) else payload
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(payload)
+
+    do_GET = do_HEAD = do_POST = handle_any
+
+    def log_message(self, format, *args):
+        pass
+
+
+class StubServer:
+    """Local stand-in HTTP server.
+
+    route() queues responses per (method, path); the last one repeats. validate()
+    gives a path an ETag and/or Last-Modified: matching conditional requests get
+    a 304, other responses carry the validators. Every request is recorded in
+    self.requests as (method, path, body, monotonic time, headers).
+    """
+
+    def __init__(self):
+        self.routes = {}
+        self.validators = {} # path -> response headers (ETag / Last-Modified)
+        self.requests = []
+        self.lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', 0), StubHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.stub = self
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self.thread.start()
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.httpd.server_address[1]}"
+
+    def url(self, path):
+        return self.base_url + path
+
+    def route(self, method, path, *responses):
+        """responses: (status, headers, body) tuples, or a callable taking (path, body)."""
+        self.routes[(method, path.split('?')[0])] = list(responses)
+
+    def validate(self, path, etag=None, last_modified=None):
+        self.validators[path] = {name: value for name, value in (('ETag', etag), ('Last-Modified', last_modified)) if value}
+
+    def respond(self, method, path, body, headers=None):
+        headers = headers or {}
+        with self.lock:
+            self.requests.append((method, path, body, time.monotonic(), headers))
+            validators = self.validators.get(path.split('?')[0], {})
+            if validators and (headers.get('If-None-Match') == validators.get('ETag', object())
+                               or headers.get('If-Modified-Since') == validators.get('Last-Modified', object())):
+                return 304, dict(validators), ''
+            queue = self.routes.get((method, path.split('?')[0]))
+            if not queue:
+                return 404, {}, ''
+            response = queue.pop(0) if len(queue) > 1 else queue[0]
+        status, response_headers, payload = response(path, body) if callable(response) else response
+        return status, dict(validators, **response_headers), payload
+
+    def hits(self, method=None, path=None):
+        return [r for r in self.requests
+                if (method is None or r[0] == method) and (path is None or r[1].split('?')[0] == path)]
+
+    def close(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+@pytest.fixture
+def stub_server():
+    server = StubServer()
+    yield server
+    server.close()
+
+
+@pytest.fixture
+def refused_url():
+    # A port that was just free: connecting to it is refused
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        port = s.getsockname()[1]
+    return f"http://127.0.0.1:{port}/"
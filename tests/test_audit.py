@@ -0,0 +1,123 @@
+import multiprocessing
+import time
+
+from audit import SEOAudit
+from link_checker import LinkCache
+
+
+def make_audit(root, link_cache_path):
+    audit = SEOAudit(str(root), workers=1, link_cache_path=link_cache_path, page_cache_path=None)
+    audit.link_checker_options.update(per_host_interval=0, retries=0)
+    return audit
+
+
+def check_links(root, link_cache_path, urls):
+    audit = make_audit(root, link_cache_path)
+    audit.external_links = {(url, 'index.html') for url in urls}
+    audit.check_external_links()
+    return audit
+
+
+def age_entries(link_cache_path, seconds):
+    cache = LinkCache(link_cache_path)
+    cache.conn.execute("UPDATE links SET checked_at = checked_at - ?", (seconds,))
+    cache.close()
+
+
+def test_stale_link_is_revalidated_with_etag(stub_server, tmp_path):
+    stub_server.route('HEAD', '/page', (200, {}, ''))
+    stub_server.validate('/page', etag='"v1"')
+    url = stub_server.url('/page')
+    cache_path = str(tmp_path / 'links.sqlite')
+
+    first = check_links(tmp_path, cache_path, [url])
+    assert first.link_cache_stats == {'hits': 0, 'revalidated': 0, 'misses': 1}
+    assert 'If-None-Match' not in stub_server.hits()[0][4]
+
+    # Fresh entries are used without any request
+    second = check_links(tmp_path, cache_path, [url])
+    assert second.link_cache_stats['hits'] == 1 and len(stub_server.hits()) == 1
+
+    # Past its TTL the entry is revalidated; the 304 keeps the cached result and restarts the TTL
+    age_entries(cache_path, 8 * 86400)
+    before = time.time()
+    third = check_links(tmp_path, cache_path, [url])
+    assert third.link_cache_stats == {'hits': 0, 'revalidated': 1, 'misses': 0}
+    assert stub_server.hits()[-1][4].get('If-None-Match') == '"v1"'
+    assert third.score == 100
+
+    cache = LinkCache(cache_path)
+    entry = cache.get(url)
+    cache.close()
+    assert entry['ok'] and entry['status'] == 200 and entry['etag'] == '"v1"'
+    assert entry['checked_at'] >= before
+
+
+def test_stale_link_is_revalidated_with_last_modified(stub_server, tmp_path):
+    stamp = 'Wed, 01 May 2024 10:00:00 GMT'
+    stub_server.route('HEAD', '/page', (200, {}, ''))
+    stub_server.validate('/page', last_modified=stamp)
+    url = stub_server.url('/page')
+    cache_path = str(tmp_path / 'links.sqlite')
+
+    check_links(tmp_path, cache_path, [url])
+    age_entries(cache_path, 8 * 86400)
+    audit = check_links(tmp_path, cache_path, [url])
+
+    assert audit.link_cache_stats['revalidated'] == 1
+    assert stub_server.hits()[-1][4].get('If-Modified-Since') == stamp
+
+
+def test_changed_link_is_checked_again(stub_server, tmp_path):
+    stub_server.route('HEAD', '/page', (200, {}, ''))
+    stub_server.validate('/page', etag='"v1"')
+    url = stub_server.url('/page')
+    cache_path = str(tmp_path / 'links.sqlite')
+
+    check_links(tmp_path, cache_path, [url])
+    age_entries(cache_path, 8 * 86400)
+    # The page is gone now: the validator no longer matches and the real status comes back
+    stub_server.validate('/page', etag='"v2"')
+    stub_server.route('HEAD', '/page', (404, {}, ''))
+    stub_server.route('GET', '/page', (404, {}, ''))
+    audit = check_links(tmp_path, cache_path, [url])
+
+    assert audit.link_cache_stats == {'hits': 0, 'revalidated': 0, 'misses': 1}
+    assert audit.score < 100
+    cache = LinkCache(cache_path)
+    assert cache.get(url)['status'] == 404
+    cache.close()
+
+
+def write_site(root, pages):
+    for i in range(pages):
+        links = f'<a href="/p{(i + 1) % pages}.html">next</a><a href="/missing.html">gone</a>'
+        (root / f'p{i}.html').write_text(
+            f'<html><head><title>Page {i}</title></head><body><h1>Page {i}</h1>{links}</body></html>', encoding='utf-8')
+
+
+def analyze(root, workers, report_path, mp_context=None):
+    audit = SEOAudit(str(root), workers=workers, link_cache_path=None, page_cache_path=None)
+    audit.mp_context = mp_context
+    audit.open_report(str(report_path))
+    audit.scan_files()
+    audit.analyze_pages()
+    audit.report.close(audit.score)
+    with open(report_path, encoding='utf-8') as f:
+        return audit, f.read()
+
+
+def test_parallel_analysis_under_spawn_with_report_open(tmp_path):
+    site = tmp_path / 'site'
+    site.mkdir()
+    write_site(site, 60)
+
+    # spawn pickles the audit for every worker, open report files included
+    parallel, parallel_report = analyze(site, 4, tmp_path / 'parallel.jsonl', multiprocessing.get_context('spawn'))
+    serial, serial_report = analyze(site, 1, tmp_path / 'serial.jsonl')
+
+    assert len(parallel.files_to_scan) >= parallel.parallel_threshold
+    assert parallel.stats == serial.stats and parallel.stats['pages_scanned'] == 60
+    assert parallel.score == serial.score
+    assert parallel_report == serial_report
+    assert parallel.stats['dead_links'] == 60
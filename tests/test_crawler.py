@@ -0,0 +1,111 @@
+import asyncio
+import json
+from collections import defaultdict
+
+from audit import SEOAudit
+from crawler import SiteCrawler
+
+PAGE = '<html><head><title>{0}</title></head><body>{1}</body></html>'
+
+
+def crawl(crawler, on_page=None):
+    crawler.on_page = on_page
+    # A dead worker used to leave queue.join() waiting forever; fail instead of hanging
+    return asyncio.run(asyncio.wait_for(crawler.crawl_async(), 10))
+
+
+def test_bad_hrefs_are_skipped_one_at_a_time(stub_server):
+    links = ''.join(f'<a href="/p{i}">p{i}</a><a href="http://[oops/">bad</a>' for i in range(3))
+    stub_server.route('GET', '/', (200, {'Content-Type': 'text/html'}, PAGE.format('home', links)))
+    for i in range(3):
+        body = PAGE.format(f'p{i}', '<a href="http://[oops/">bad</a><a href="/">home</a>')
+        stub_server.route('GET', f'/p{i}', (200, {'Content-Type': 'text/html'}, body))
+
+    pages = crawl(SiteCrawler(stub_server.url('/'), concurrency=2))
+
+    assert sorted(pages) == [stub_server.url(p) for p in ('/', '/p0', '/p1', '/p2')]
+    assert all(record['status'] == 200 for record in pages.values())
+
+
+def test_page_errors_become_error_records(stub_server):
+    links = '<a href="/broken-gzip">a</a><a href="/raises">b</a><a href="/fine">c</a>'
+    stub_server.route('GET', '/', (200, {'Content-Type': 'text/html'}, PAGE.format('home', links)))
+    stub_server.route('GET', '/broken-gzip', (200, {'Content-Type': 'text/html', 'Content-Encoding': 'gzip'}, b'not gzip'))
+    stub_server.route('GET', '/raises', (200, {'Content-Type': 'text/html'}, PAGE.format('raises', '')))
+    stub_server.route('GET', '/fine', (200, {'Content-Type': 'text/html'}, PAGE.format('fine', '')))
+
+    def on_page(url, elements):
+        if url.endswith('/raises'):
+            raise RuntimeError('page check failed')
+
+    pages = crawl(SiteCrawler(stub_server.url('/'), concurrency=1), on_page)
+
+    assert pages[stub_server.url('/fine')]['status'] == 200
+    for path in ('/broken-gzip', '/raises'):
+        record = pages[stub_server.url(path)]
+        assert record['status'] == 'Crawl Error'
+        assert record['error']
+    assert 'page check failed' in pages[stub_server.url('/raises')]['error']
+
+
+def serve_site(stub_server):
+    """A small site whose robots.txt and sitemap name the production domain, as deployed ones do."""
+    html = {'Content-Type': 'text/html'}
+    robots = 'User-agent: *\nDisallow: /private\nSitemap: https://example.com/sitemap.xml\n'
+    locs = ['/', '/about', '/unlinked', '/old', '/private/report']
+    sitemap = ('<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">'
+               + ''.join(f'<url><loc>https://example.com{loc}</loc></url>' for loc in locs) + '</urlset>')
+    links = '<a href="/about">about</a><a href="/extra">extra</a><a href="/private/secret">secret</a><a href="/old">old</a>'
+    stub_server.route('GET', '/robots.txt', (200, {'Content-Type': 'text/plain'}, robots))
+    stub_server.route('GET', '/sitemap.xml', (200, {'Content-Type': 'application/xml'}, sitemap))
+    stub_server.route('GET', '/', (200, html, PAGE.format('home', links)))
+    for path in ('/about', '/extra', '/unlinked', '/new'):
+        stub_server.route('GET', path, (200, html, PAGE.format(path, '<a href="/">home</a>')))
+    stub_server.route('GET', '/old', (301, {'Location': '/new'}, ''))
+
+
+def test_robots_sitemap_and_redirects(stub_server):
+    serve_site(stub_server)
+    crawler = SiteCrawler(stub_server.url('/'), concurrency=2)
+
+    pages = crawl(crawler)
+
+    # Sitemap entries on the production domain are mapped onto the crawl origin
+    assert crawler.aliases == {'https://example.com'}
+    assert crawler.sitemap_urls == [stub_server.url(p) for p in ('/', '/about', '/unlinked', '/old', '/private/report')]
+    assert crawler.normalize('https://example.com/about#team') == stub_server.url('/about')
+
+    # Disallowed URLs are recorded but never requested
+    assert crawler.blocked == {stub_server.url('/private/secret'), stub_server.url('/private/report')}
+    assert not [hit for hit in stub_server.hits('GET') if hit[1].startswith('/private')]
+
+    # Redirects are recorded with their target, which is crawled in turn
+    assert pages[stub_server.url('/old')]['status'] == 301
+    assert pages[stub_server.url('/old')]['location'] == stub_server.url('/new')
+    assert pages[stub_server.url('/new')]['status'] == 200
+    assert crawler.referrers[stub_server.url('/new')] == {stub_server.url('/old')}
+    assert crawler.referrers[stub_server.url('/about')] == {stub_server.url('/')}
+
+    assert sorted(pages) == [stub_server.url(p) for p in ('/', '/about', '/extra', '/new', '/old', '/unlinked')]
+    assert all(record['ttfb'] is not None and 0 <= record['ttfb'] <= record['time'] for record in pages.values())
+
+
+def test_sitemap_cross_check(stub_server, tmp_path):
+    serve_site(stub_server)
+    audit = SEOAudit(str(tmp_path), workers=1, link_cache_path=None, page_cache_path=None)
+    audit.crawl_options['concurrency'] = 2
+    audit.open_report(str(tmp_path / 'report.jsonl'))
+
+    audit.run_crawl(stub_server.url('/'))
+
+    issues = defaultdict(set)
+    with open(tmp_path / 'report.jsonl', encoding='utf-8') as f:
+        for line in f:
+            record = json.loads(line)
+            if record['type'] == 'issue':
+                issues[record['rule']].add(record['page'])
+    assert issues['sitemap-orphan'] == {stub_server.url('/unlinked')}
+    assert issues['sitemap-blocked'] == {stub_server.url('/private/report')}
+    assert issues['sitemap-redirect'] == {stub_server.url('/old')}
+    assert issues['missing-from-sitemap'] == {stub_server.url('/extra'), stub_server.url('/new')}
+    assert 'missing-sitemap' not in issues and 'http-error' not in issues
@@ -0,0 +1,114 @@
+import time
+
+import pytest
+
+from link_checker import DEFAULT_CACHE_TTLS, LinkCache, LinkChecker, outcome_class
+
+
+def make_checker(**kwargs):
+    options = dict(timeout=5, per_host_interval=0, retries=2, backoff=0.01)
+    options.update(kwargs)
+    return LinkChecker(**options)
+
+
+def test_duplicate_urls_are_checked_once(stub_server):
+    stub_server.route('HEAD', '/page', (200, {}, ''))
+    url = stub_server.url('/page')
+
+    results = make_checker().check([url, url, url])
+
+    assert list(results) == [url]
+    assert results[url]['ok'] and results[url]['method'] == 'HEAD'
+    assert len(stub_server.hits()) == 1
+
+
+@pytest.mark.parametrize('head_status', [405, 501])
+def test_rejected_head_falls_back_to_get(stub_server, head_status):
+    stub_server.route('HEAD', '/page', (head_status, {}, ''))
+    stub_server.route('GET', '/page', (200, {}, 'hello'))
+    url = stub_server.url('/page')
+
+    result = make_checker().check([url])[url]
+
+    assert result['ok'] and result['status'] == 200 and result['method'] == 'GET'
+    assert [r[0] for r in stub_server.hits()] == ['HEAD', 'GET']
+
+
+def test_429_waits_for_retry_after(stub_server):
+    stub_server.route('HEAD', '/busy', (429, {'Retry-After': '1'}, ''), (200, {}, ''))
+    url = stub_server.url('/busy')
+
+    result = make_checker().check([url])[url]
+
+    assert result['ok'] and result['status'] == 200
+    first, second = stub_server.hits()
+    assert second[3] - first[3] >= 0.9 # Retry-After beats the 0.01s backoff
+
+
+def test_persistent_429_is_reported_after_retries(stub_server):
+    stub_server.route('HEAD', '/busy', (429, {'Retry-After': '0'}, ''))
+    url = stub_server.url('/busy')
+
+    result = make_checker(retries=2).check([url])[url]
+
+    assert not result['ok'] and result['status'] == 429
+    assert len(stub_server.hits()) == 3
+    assert outcome_class(url, result) == 'server_error'
+
+
+def test_refused_connection(refused_url):
+    result = make_checker(retries=1).check([refused_url])[refused_url]
+
+    assert not result['ok']
+    assert result['status'] == 'Connection Error'
+    assert result['error']
+    assert outcome_class(refused_url, result) == 'connection_error'
+
+
+def test_redirect_is_followed(stub_server):
+    stub_server.route('HEAD', '/old', (301, {'Location': '/new'}, ''))
+    stub_server.route('HEAD', '/new', (200, {}, ''))
+    url = stub_server.url('/old')
+
+    result = make_checker().check([url])[url]
+
+    assert result['ok'] and result['final_url'] == stub_server.url('/new')
+    assert outcome_class(url, result) == 'redirect'
+
+
+OUTCOMES = {
+    'ok': {'ok': True, 'status': 200, 'final_url': 'https://example.com/'},
+    'redirect': {'ok': True, 'status': 200, 'final_url': 'https://example.com/moved'},
+    'client_error': {'ok': False, 'status': 404, 'final_url': 'https://example.com/'},
+    'server_error': {'ok': False, 'status': 503, 'final_url': 'https://example.com/'},
+    'connection_error': {'ok': False, 'status': 'Connection Error', 'final_url': 'https://example.com/'}
+}
+
+
+@pytest.mark.parametrize('outcome', sorted(OUTCOMES))
+def test_cache_ttl_per_outcome_class(tmp_path, outcome):
+    url = 'https://example.com/'
+    ttl = DEFAULT_CACHE_TTLS[outcome]
+    now = time.time()
+    cache = LinkCache(str(tmp_path / 'links.sqlite'))
+    cache.put(url, OUTCOMES[outcome], checked_at=now - ttl + 60)
+
+    entry = cache.get(url)
+    assert outcome_class(url, entry) == outcome
+    assert entry['status'] == OUTCOMES[outcome]['status']
+    assert cache.is_fresh(url, entry, now)
+    assert not cache.is_fresh(url, entry, now + 120)
+    cache.close()
+
+
+def test_cache_ttl_override_and_prune(tmp_path):
+    url = 'https://example.com/'
+    path = str(tmp_path / 'links.sqlite')
+    cache = LinkCache(path, ttls={'ok': 10})
+    cache.put(url, OUTCOMES['ok'], checked_at=time.time() - 20)
+    entry = cache.get(url)
+    assert not cache.is_fresh(url, entry)
+
+    cache.prune(15)
+    assert cache.get(url) is None
+    cache.close()
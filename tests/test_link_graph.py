@@ -0,0 +1,66 @@
+import pytest
+
+import link_graph
+from link_graph import build_graph, click_depths, fallback_is_slow, pagerank, LARGE_GRAPH_EDGES
+
+# index -> about, posts; about -> index; posts -> post-a, post-b; post-a -> post-b; post-b links nowhere
+LINKS = {
+    'about.html': ['index.html'],
+    'posts.html': ['index.html'],
+    'index.html': ['about.html'],
+    'post-a.html': ['posts.html'],
+    'post-b.html': ['posts.html', 'post-a.html', 'post-b.html'],
+    'missing.html': ['index.html']
+}
+PAGES = ['index.html', 'about.html', 'posts.html', 'post-a.html', 'post-b.html', 'lost.html']
+
+
+def toy_graph():
+    nodes, edges = build_graph(PAGES, LINKS)
+    return nodes, edges, {page: i for i, page in enumerate(nodes)}
+
+
+def test_build_graph_drops_self_links_and_unknown_pages():
+    nodes, edges, index = toy_graph()
+    assert nodes == sorted(PAGES)
+    assert (index['post-b.html'], index['post-b.html']) not in edges
+    assert len(edges) == 6
+
+
+def test_pagerank_fallback_matches_numpy(monkeypatch):
+    pytest.importorskip('numpy')
+    nodes, edges, _ = toy_graph()
+    vectorized = pagerank(len(nodes), edges)
+    monkeypatch.setattr(link_graph, 'np', None)
+    fallback = pagerank(len(nodes), edges)
+    assert fallback == pytest.approx(vectorized, abs=1e-9)
+
+
+def test_pagerank_fallback(monkeypatch):
+    monkeypatch.setattr(link_graph, 'np', None)
+    nodes, edges, index = toy_graph()
+    ranks = pagerank(len(nodes), edges)
+    assert sum(ranks) == pytest.approx(1.0)
+    # Linked from two pages beats linked from one; nothing links to lost.html
+    assert ranks[index['post-b.html']] > ranks[index['post-a.html']]
+    assert ranks[index['lost.html']] == min(ranks)
+
+    # A cycle spreads rank evenly
+    assert pagerank(3, [(0, 1), (1, 2), (2, 0)]) == pytest.approx([1 / 3] * 3)
+    assert pagerank(0, []) == []
+
+
+def test_click_depths_from_home():
+    nodes, edges, index = toy_graph()
+    depths = click_depths(len(nodes), edges, index['index.html'])
+    assert {page: depths[index[page]] for page in nodes} == {
+        'index.html': 0, 'about.html': 1, 'posts.html': 1, 'post-a.html': 2, 'post-b.html': 2, 'lost.html': None
+    }
+
+
+def test_large_graph_fallback_is_flagged(monkeypatch):
+    monkeypatch.setattr(link_graph, 'np', None)
+    assert fallback_is_slow(LARGE_GRAPH_EDGES)
+    assert not fallback_is_slow(LARGE_GRAPH_EDGES - 1)
+    monkeypatch.setattr(link_graph, 'np', object())
+    assert not fallback_is_slow(LARGE_GRAPH_EDGES)
@@ -0,0 +1,289 @@
+import asyncio
+import contextlib
+import json
+import time
+from collections import Counter, defaultdict
+
+from aiohttp import web
+
+import miner as miner_module
+from miner import (BASE_PRIORITY, INITIAL_CONCURRENCY, LOCALE, AdaptiveLimiter, Frontier, SuggestCache, SuggestMiner,
+                   TokenBucket, make_collector)
+from suggest_standin import STATE_KEY, make_app, suggestions_for
+
+
+@contextlib.asynccontextmanager
+async def standin(rate=50.0, burst=50, **options):
+    """Stand-in suggest server on a free port; yields (request state, miner sources)."""
+    app = make_app(**options)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    base = f"http://127.0.0.1:{runner.addresses[0][1]}"
+    sources = {
+        'Google': {'url': base + '/complete/search', 'rate': rate, 'burst': burst},
+        'Bing': {'url': base + '/osjson.aspx', 'rate': rate, 'burst': burst}
+    }
+    try:
+        yield app[STATE_KEY], sources
+    finally:
+        await runner.cleanup()
+
+
+async def mine(miner, queries):
+    frontier = Frontier()
+    for query in queries:
+        frontier.push(BASE_PRIORITY, (query, query, 0))
+    results = {}
+    await miner.run(frontier, lambda task, found: results.__setitem__(task[0], found))
+    return results
+
+
+def test_token_bucket_paces_after_burst():
+    async def scenario():
+        bucket = TokenBucket(rate=20, capacity=2)
+        started = time.monotonic()
+        for _ in range(12):
+            await bucket.acquire()
+        return time.monotonic() - started
+
+    elapsed = asyncio.run(scenario())
+    # 2 tokens of burst, then 10 more at 20/s
+    assert 0.45 <= elapsed < 0.9
+
+
+def test_requests_to_standin_follow_the_bucket_rate():
+    async def scenario():
+        async with standin(rate=10.0, burst=1) as (state, sources):
+            await mine(SuggestMiner(sources), [f"q{i}" for i in range(6)])
+            return state['times']['Google']
+
+    times = asyncio.run(scenario())
+    assert len(times) == 6
+    assert times[-1] - times[0] >= 0.45 # 5 gaps of 0.1s
+
+
+def test_limiter_halves_on_429_and_grows_additively():
+    limiter = AdaptiveLimiter(initial=8, maximum=16)
+    limiter.record(0.1, throttled=True)
+    assert limiter.limit == 4
+
+    # A burst of 429s within the cooldown counts once
+    limiter.record(0.1, throttled=True)
+    assert limiter.limit == 4 and limiter.backoffs == 1
+
+    limiter.last_backoff -= 10
+    limiter.record(0.1, throttled=True)
+    assert limiter.limit == 2 and limiter.backoffs == 2
+
+    limiter.record(0.1)
+    assert limiter.limit == 2.5
+
+
+def test_429_from_standin_halves_concurrency():
+    async def scenario():
+        async with standin(throttle_first={'Google': 1}, retry_after=0) as (state, sources):
+            miner = SuggestMiner(sources)
+            results = await mine(miner, ['youtube'])
+            return state, miner, results
+
+    state, miner, results = asyncio.run(scenario())
+    assert results['youtube']['Google'] == suggestions_for('Google', 'youtube')
+    assert state['throttled']['Google'] == 1 and miner.stats['Google']['throttled'] == 1
+    assert miner.limiters['Google'].backoffs == 1
+    assert int(miner.limiters['Google'].limit) == INITIAL_CONCURRENCY // 2
+    assert miner.limiters['Bing'].backoffs == 0
+
+
+def test_retry_after_becomes_token_debt():
+    async def scenario():
+        bucket = TokenBucket(rate=10, capacity=5)
+        bucket.pause(0.5)
+        started = time.monotonic()
+        await bucket.acquire()
+        return bucket, time.monotonic() - started
+
+    bucket, waited = asyncio.run(scenario())
+    assert waited >= 0.55 # 5 tokens of debt plus the one being taken, at 10/s
+
+    # Several 429s arriving together don't stack their pauses
+    bucket.pause(1)
+    bucket.pause(1)
+    assert -11 < bucket.tokens <= -9.9
+
+
+def test_retry_after_from_standin_delays_the_retry():
+    async def scenario():
+        async with standin(throttle_first={'Google': 1}, retry_after=1) as (state, sources):
+            results = await mine(SuggestMiner(sources), ['youtube'])
+            return state, results
+
+    state, results = asyncio.run(scenario())
+    first, second = state['times']['Google']
+    assert second - first >= 0.95
+    assert results['youtube']['Google'] == suggestions_for('Google', 'youtube')
+    assert state['hits']['Bing'] == 1
+
+
+def test_second_fully_cached_run_makes_no_requests(tmp_path):
+    queries = ['youtube', 'youtube premium', '油管']
+
+    async def scenario():
+        async with standin() as (state, sources):
+            cache = SuggestCache(str(tmp_path / 'cache.sqlite'), ttl=3600)
+            first = SuggestMiner(sources, cache)
+            first_results = await mine(first, queries)
+            hits_after_first = sum(state['hits'].values())
+
+            second = SuggestMiner(sources, cache)
+            second_results = await mine(second, queries)
+            cache.close()
+            return first, second, first_results, second_results, hits_after_first, sum(state['hits'].values())
+
+    first, second, first_results, second_results, hits_after_first, hits_after_second = asyncio.run(scenario())
+    assert first.requests_used() == 6 and hits_after_first == 6
+    assert second.requests_used() == 0 and hits_after_second == hits_after_first
+    assert sum(stats['cached'] for stats in second.stats.values()) == 6
+    assert second_results == first_results
+
+
+def test_malformed_responses_are_not_cached(tmp_path):
+    async def scenario():
+        async with standin(body='null') as (state, sources):
+            cache = SuggestCache(str(tmp_path / 'cache.sqlite'), ttl=3600)
+            miner = SuggestMiner(sources, cache)
+            results = await mine(miner, ['youtube'])
+            rows = cache.conn.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            cache.close()
+            return miner, results, rows
+
+    miner, results, rows = asyncio.run(scenario())
+    assert results['youtube'] == {'Google': [], 'Bing': []}
+    assert miner.stats['Google']['failed'] == 1 and miner.stats['Bing']['failed'] == 1
+    assert rows == 0
+
+
+def test_bad_cached_rows_are_evicted_and_refetched(tmp_path):
+    cache_path = str(tmp_path / 'cache.sqlite')
+    cache = SuggestCache(cache_path, ttl=3600)
+    cache.put('Google', 'youtube', LOCALE, 'null') # Written by an older version that cached before parsing
+    cache.put('Bing', 'youtube', LOCALE, '[')
+    cache.close()
+
+    async def scenario():
+        async with standin() as (state, sources):
+            cache = SuggestCache(cache_path, ttl=3600)
+            miner = SuggestMiner(sources, cache)
+            results = await mine(miner, ['youtube'])
+            cached = {source: cache.get(source, 'youtube', LOCALE) for source in sources}
+            cache.close()
+            return miner, results, cached
+
+    miner, results, cached = asyncio.run(scenario())
+    assert results['youtube']['Google'] == suggestions_for('Google', 'youtube')
+    assert miner.requests_used() == 2
+    assert all(json.loads(body)[1] == suggestions_for(source, 'youtube') for source, body in cached.items())
+
+
+def test_frontier_order_and_reprioritization():
+    frontier = Frontier()
+    assert frontier.push(1, ('low', 'low', 0))
+    assert frontier.push(2, ('deep', 'deep', 2))
+    assert frontier.push(2, ('shallow', 'shallow', 1))
+    assert not frontier.push(1, ('LOW ', 'low', 0)) # Same query after normalization, no better score
+
+    # Recommended again with a higher score: requeued, the old entry is skipped and not counted
+    assert frontier.push(3, ('low', 'low', 0))
+    assert len(frontier.heap) == 4 and len(frontier) == 3
+
+    assert [frontier.pop()[0] for _ in range(3)] == ['low', 'shallow', 'deep']
+    assert frontier.pop() is None and len(frontier) == 0
+    assert not frontier.push(5, ('low', 'low', 3)) # Already mined
+
+
+def expand(sources, seeds, max_depth, **limits):
+    """Set up mining seeds (query, score) with the real collector.
+
+    Returns (miner, query order, depth counts, frontier, run); await run() to mine.
+    """
+    frontier = Frontier()
+    for query, score in seeds:
+        frontier.push(score, (query, query, 0))
+    temp_storage = defaultdict(lambda: {'sources': set(), 'seed': ''})
+    depth_counts = Counter()
+    collect = make_collector(frontier, temp_storage, depth_counts, max_depth)
+    order = []
+
+    def on_result(task, results):
+        order.append(task[0])
+        collect(task, results)
+
+    miner = SuggestMiner(sources)
+
+    async def scenario():
+        return await miner.run(frontier, on_result, **limits)
+
+    return miner, order, depth_counts, frontier, scenario
+
+
+def test_children_are_expanded_once_per_query():
+    async def scenario():
+        async with standin() as (state, sources):
+            miner, order, depth_counts, frontier, run = expand(sources, [('youtube', BASE_PRIORITY)], max_depth=2)
+            return state, miner, order, depth_counts, frontier, await run()
+
+    state, miner, order, depth_counts, frontier, expanded = asyncio.run(scenario())
+    # 'youtube price' comes back from both sources but is queried once: 1 seed, 3 children, 3 x 3 grandchildren
+    assert depth_counts == {0: 1, 1: 3, 2: 9}
+    assert expanded == len(order) == len(set(order)) == 13
+    assert 'youtube price' in order and 'youtube price 下载' in order
+    assert state['hits'] == {'Google': 13, 'Bing': 13}
+    # Suggestions of the last layer are recorded but not queued
+    assert len(frontier) == 0
+
+
+def test_higher_scores_are_mined_first(monkeypatch):
+    monkeypatch.setattr(miner_module, 'MAX_WORKERS', 1) # One query at a time, so the order is the pop order
+
+    async def scenario():
+        async with standin() as (state, sources):
+            miner, order, depth_counts, frontier, run = expand(sources, [('youtube', BASE_PRIORITY), ('netflix', 1)], max_depth=1)
+            await run()
+            return order
+
+    order = asyncio.run(scenario())
+    # Children of youtube score 2 (both sources, or one source + Chinese) and beat the seed netflix at 1
+    assert order[0] == 'youtube'
+    assert sorted(order[1:4]) == ['youtube price', 'youtube 下载', 'youtube 教程']
+    assert order[4] == 'netflix'
+    assert sorted(order[5:]) == ['netflix price', 'netflix 下载', 'netflix 教程']
+
+    async def requeued():
+        async with standin() as (state, sources):
+            miner, order, depth_counts, frontier, run = expand(sources, [('youtube', BASE_PRIORITY), ('netflix', 1)], max_depth=1)
+            frontier.push(3, ('netflix', 'netflix', 0))
+            assert len(frontier) == 2
+            await run()
+            return order
+
+    assert asyncio.run(requeued())[:2] == ['youtube', 'netflix']
+
+
+def test_limits_stop_the_run():
+    async def scenario(max_depth, **limits):
+        async with standin() as (state, sources):
+            miner, order, depth_counts, frontier, run = expand(sources, [('youtube', BASE_PRIORITY)], max_depth, **limits)
+            expanded = await run()
+            return miner, expanded, len(frontier)
+
+    miner, expanded, remaining = asyncio.run(scenario(0))
+    assert expanded == 1 and remaining == 0 and miner.requests_used() == 2
+
+    miner, expanded, remaining = asyncio.run(scenario(2, max_nodes=5))
+    # The seed, its 3 children and 1 of the 9 grandchildren they turned up
+    assert expanded == 5 and remaining == 8
+
+    # Queries in flight count against the budget, so the run never starts one it can't afford
+    miner, expanded, remaining = asyncio.run(scenario(2, max_requests=6))
+    assert expanded == 3 and miner.requests_used() == 6 and remaining == 1 + 2 * 3
@@ -0,0 +1,106 @@
+import json
+
+import submit_indexnow
+from submit_indexnow import IndexNowSubmitter, MAX_URLS_PER_REQUEST, SubmissionLedger, diff_against_ledger
+
+ACCEPTED = (200, {}, '')
+
+
+def write_sitemap(directory, entries):
+    urls = ''.join(f"<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>" for loc, lastmod in entries)
+    (directory / 'sitemap.xml').write_text(
+        f'<?xml version="1.0" encoding="UTF-8"?><urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">{urls}</urlset>',
+        encoding='utf-8')
+
+
+def posted_urls(stub_server):
+    return [json.loads(body)['urlList'] for method, path, body, *_ in stub_server.hits('POST', '/indexnow')]
+
+
+def test_diff_against_ledger():
+    versions = {'https://a/new': 'v1', 'https://a/same': 'v1', 'https://a/edited': 'v2'}
+    submitted = {'https://a/same': 'v1', 'https://a/edited': 'v1', 'https://a/gone': 'v1'}
+
+    assert diff_against_ledger(versions, submitted) == (['https://a/new'], ['https://a/edited'], ['https://a/gone'])
+
+
+def test_only_new_and_changed_urls_are_resubmitted(stub_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(submit_indexnow, 'CURRENT_DIR', str(tmp_path))
+    monkeypatch.setattr(submit_indexnow, 'LASTMOD_LEDGER_PATH', str(tmp_path / 'lastmod.json'))
+    stub_server.route('POST', '/indexnow', ACCEPTED)
+    endpoint = stub_server.url('/indexnow')
+    ledger_path = str(tmp_path / 'indexnow.sqlite')
+
+    write_sitemap(tmp_path, [('https://a/one', '2024-01-01'), ('https://a/two', '2024-01-01'), ('https://a/three', '2024-01-01')])
+    submit_indexnow.submit_to_indexnow(endpoints=[endpoint], ledger_path=ledger_path)
+    assert posted_urls(stub_server) == [['https://a/one', 'https://a/two', 'https://a/three']]
+
+    # Nothing changed: nothing is sent
+    submit_indexnow.submit_to_indexnow(endpoints=[endpoint], ledger_path=ledger_path)
+    assert len(posted_urls(stub_server)) == 1
+
+    # One page edited, one added, one removed
+    write_sitemap(tmp_path, [('https://a/one', '2024-01-01'), ('https://a/two', '2024-02-01'), ('https://a/four', '2024-02-01')])
+    submit_indexnow.submit_to_indexnow(endpoints=[endpoint], ledger_path=ledger_path)
+    assert posted_urls(stub_server)[-1] == ['https://a/four', 'https://a/two', 'https://a/three']
+
+    ledger = SubmissionLedger(ledger_path)
+    assert ledger.entries() == {'https://a/one': '2024-01-01', 'https://a/two': '2024-02-01', 'https://a/four': '2024-02-01'}
+    ledger.close()
+
+
+def test_rejected_urls_stay_out_of_the_ledger(stub_server, tmp_path, monkeypatch):
+    monkeypatch.setattr(submit_indexnow, 'CURRENT_DIR', str(tmp_path))
+    monkeypatch.setattr(submit_indexnow, 'LASTMOD_LEDGER_PATH', str(tmp_path / 'lastmod.json'))
+    stub_server.route('POST', '/indexnow', (403, {}, 'Key not valid'))
+    ledger_path = str(tmp_path / 'indexnow.sqlite')
+
+    write_sitemap(tmp_path, [('https://a/one', '2024-01-01')])
+    submit_indexnow.submit_to_indexnow(endpoints=[stub_server.url('/indexnow')], ledger_path=ledger_path)
+
+    ledger = SubmissionLedger(ledger_path)
+    assert ledger.entries() == {}
+    ledger.close()
+
+
+def test_urls_are_chunked_at_the_batch_limit(stub_server):
+    stub_server.route('POST', '/indexnow', ACCEPTED)
+    urls = [f"https://a/p{i}" for i in range(MAX_URLS_PER_REQUEST + 1)]
+
+    status = IndexNowSubmitter([stub_server.url('/indexnow')], min_interval=0).submit(urls)
+
+    assert [len(batch) for batch in posted_urls(stub_server)] == [MAX_URLS_PER_REQUEST, 1]
+    assert len(status[stub_server.url('/indexnow')]['accepted']) == len(urls)
+
+
+def test_429_and_5xx_are_retried_with_backoff(stub_server):
+    stub_server.route('POST', '/indexnow', (429, {'Retry-After': '1'}, ''), (503, {}, ''), ACCEPTED)
+    endpoint = stub_server.url('/indexnow')
+
+    status = IndexNowSubmitter([endpoint], min_interval=0, backoff=0.2).submit(['https://a/one'])[endpoint]
+
+    assert status['accepted'] == ['https://a/one']
+    assert status['requests'] == 3 and status['retries'] == 2
+    times = [hit[3] for hit in stub_server.hits('POST', '/indexnow')]
+    assert times[1] - times[0] >= 0.9 # Retry-After: 1 beats the 0.2s first backoff
+    assert times[2] - times[1] >= 0.35 # Second attempt backs off 0.4s
+
+
+def test_gives_up_after_retries(stub_server):
+    stub_server.route('POST', '/indexnow', (500, {}, 'down'))
+    endpoint = stub_server.url('/indexnow')
+
+    status = IndexNowSubmitter([endpoint], min_interval=0, retries=2, backoff=0.01).submit(['https://a/one'])[endpoint]
+
+    assert status['accepted'] == [] and status['last_status'] == 500
+    assert status['requests'] == 3 and status['error'] == 'down'
+
+
+def test_one_endpoint_failing_does_not_block_the_others(stub_server, refused_url):
+    stub_server.route('POST', '/indexnow', ACCEPTED)
+    ok = stub_server.url('/indexnow')
+
+    status = IndexNowSubmitter([ok, refused_url], min_interval=0, retries=1, backoff=0.01).submit(['https://a/one'])
+
+    assert status[ok]['accepted'] == ['https://a/one']
+    assert status[refused_url]['accepted'] == [] and status[refused_url]['last_status'] is None